@@ -1,15 +1,21 @@
 from __future__ import annotations
 
+import io
 import os
 import html
 import tempfile
-from typing import Any, Dict, List, Tuple, Optional
+from typing import Any, Dict, Iterator, List, Tuple, Optional
 
 import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.image as mpimg
 from graphviz import Digraph
 
+try:
+    import cairosvg
+except ImportError:  # optional: fall back to Graphviz's own PNG renderer
+    cairosvg = None
+
 from pathlib import Path
 import argparse
 import shutil
@@ -42,25 +48,24 @@ def _assign_node_ids(roots: List[Dict[str, Any]]) -> Dict[int, int]:
     return ids
 
 
-def _collect_nodes(roots: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    out = []
+def _iter_nodes(roots: List[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """Lazily yields plan nodes in iterative DFS order (same order as _assign_node_ids)."""
     stack = list(roots)[::-1]
     while stack:
         n = stack.pop()
-        out.append(n)
+        yield n
         for c in n.get("children", []):
             stack.append(c)
-    return out
 
 
 def _escape(s: str) -> str:
     return html.escape(s, quote=False)
 
 
-def _render_datafusion_tree_image(parsed: Dict[str, Any], graphviz_dpi: int = 192) -> str:
+def _build_datafusion_digraph(parsed: Dict[str, Any], graphviz_dpi: Optional[int] = None) -> Digraph:
     """
-    Renders DataFusion operator tree(s) to a temporary PNG and returns the path.
-    Expects `parsed` from parse_datafusion_explain_text().
+    Builds the Graphviz operator tree for `parsed` (from parse_datafusion_explain_text()).
+    `graphviz_dpi` is only applied for raster output; leave it unset when emitting SVG.
     """
     roots = parsed.get("plan_roots") or []
     if not roots:
@@ -72,16 +77,17 @@ def _render_datafusion_tree_image(parsed: Dict[str, Any], graphviz_dpi: int = 19
         title = f"{title} (CLI v{ver})"
 
     dot = Digraph(comment='DataFusion Plan', format='png')
-    # Higher resolution PNG from Graphviz
-    dot.attr('graph', dpi=str(graphviz_dpi), ranksep='0.5', nodesep='0.25')
+    if graphviz_dpi:
+        # Higher resolution PNG from Graphviz
+        dot.attr('graph', dpi=str(graphviz_dpi))
+    dot.attr('graph', ranksep='0.5', nodesep='0.25')
     dot.attr(rankdir='BT', labelloc='t', label=title)
     dot.attr('node', shape='box', style='rounded,filled', fillcolor='lightblue')
     dot.attr('edge', dir='back')
 
     ids = _assign_node_ids(roots)
-    all_nodes = _collect_nodes(roots)
 
-    for n in all_nodes:
+    for n in _iter_nodes(roots):
         nid = ids[id(n)]
         t = n.get("type", "?")
         detail = (n.get("detail") or "").strip()
@@ -114,18 +120,48 @@ def _render_datafusion_tree_image(parsed: Dict[str, Any], graphviz_dpi: int = 19
 
         dot.node(str(nid), f"<{label}>")
 
-    for parent in all_nodes:
+    # Second pass re-walks the tree instead of holding a materialized node list
+    for parent in _iter_nodes(roots):
         pid = ids[id(parent)]
         for child in parent.get("children", []):
             cid = ids[id(child)]
             dot.edge(str(cid), str(pid))
 
+    return dot
+
+
+def _render_datafusion_tree_image(parsed: Dict[str, Any], graphviz_dpi: int = 192) -> str:
+    """
+    Renders DataFusion operator tree(s) to a temporary PNG and returns the path.
+    Expects `parsed` from parse_datafusion_explain_text().
+    """
+    dot = _build_datafusion_digraph(parsed, graphviz_dpi=graphviz_dpi)
+
     with tempfile.NamedTemporaryFile(suffix='.gv', delete=False) as tmp:
         temp_tree_path = tmp.name
     tree_image_path = dot.render(temp_tree_path, cleanup=True)
     return tree_image_path
 
 
+def _render_datafusion_tree_array(parsed: Dict[str, Any], graphviz_dpi: int = 192) -> np.ndarray:
+    """
+    Renders the operator tree straight to an in-memory image array.
+    With cairosvg installed, Graphviz emits SVG which is rasterized once at `graphviz_dpi`;
+    otherwise falls back to the temporary-PNG path.
+    """
+    if cairosvg is None:
+        tree_image_path = _render_datafusion_tree_image(parsed, graphviz_dpi=graphviz_dpi)
+        try:
+            return mpimg.imread(tree_image_path)
+        finally:
+            if os.path.exists(tree_image_path):
+                os.remove(tree_image_path)
+
+    svg_bytes = _build_datafusion_digraph(parsed).pipe(format='svg')
+    png_bytes = cairosvg.svg2png(bytestring=svg_bytes, dpi=graphviz_dpi)
+    return mpimg.imread(io.BytesIO(png_bytes), format='png')
+
+
 _COMPONENT_MAP: List[Tuple[str, str]] = [
     ("compute", "elapsed_compute_s"),
     ("fetch", "fetch_time_s"),
@@ -140,6 +176,7 @@ _COMPONENT_MAP: List[Tuple[str, str]] = [
     ("row_pushdown_eval", "row_pushdown_eval_time_s"),
     ("stats_eval", "statistics_eval_time_s"),
 ]
+_COMPONENT_NAMES: List[str] = [c for c, _ in _COMPONENT_MAP]
 
 def _extract_breakdown_rows(parsed: Dict[str, Any]) -> Tuple[List[str], Dict[str, List[float]], List[float]]:
     """
@@ -150,13 +187,12 @@ def _extract_breakdown_rows(parsed: Dict[str, Any]) -> Tuple[List[str], Dict[str
         return [], {}, []
 
     ids = _assign_node_ids(roots)
-    nodes = _collect_nodes(roots)
 
     labels: List[str] = []
     comp_values_abs: Dict[str, List[float]] = {c: [] for c, _ in _COMPONENT_MAP}
     totals: List[float] = []
 
-    for n in nodes:
+    for n in _iter_nodes(roots):
         nid = ids[id(n)]
         t = n.get("type", "?")
         labels.append(f"O{nid}: {t}")
@@ -185,16 +221,11 @@ def _plot_datafusion_execution_breakdown(ax, parsed: Dict[str, Any], normalize:
         ax.axis('off')
         return
 
-    components_present = [
-        c for c in (c for c, _ in _COMPONENT_MAP)
-        if any(v > 0 for v in comp_abs.get(c, []))
-    ]
-
-    # Ensure consistent length
     n = len(labels)
-    for c in components_present:
-        if len(comp_abs[c]) < n:
-            comp_abs[c].extend([0.0] * (n - len(comp_abs[c])))
+    # (n, C) matrix of absolute seconds; one reduction decides which components to draw
+    arr = np.array([comp_abs[c] for c in _COMPONENT_NAMES], dtype=float).T
+    present_mask = arr.sum(axis=0) > 0
+    components_present = [c for c, keep in zip(_COMPONENT_NAMES, present_mask) if keep]
 
     bottom = np.zeros(n, dtype=float)
     x = np.arange(n)
@@ -321,13 +352,14 @@ def generate_combined_visualization_datafusion(parsed: Dict[str, Any],
     - width_per_op: inches per operator for dynamic width scaling.
     - min_width: minimum figure width in inches.
     - height: figure height in inches.
-    - graphviz_dpi: PNG DPI for Graphviz-rendered tree (defaults to `dpi` if not set).
+    - graphviz_dpi: raster DPI for Graphviz-rendered tree (defaults to `dpi` if not set).
+      Rendered via SVG + cairosvg when available, else via Graphviz PNG.
     """
     roots = parsed.get("plan_roots") or []
-    n_ops = len(_collect_nodes(roots)) if roots else 0
+    n_ops = sum(1 for _ in _iter_nodes(roots)) if roots else 0
     fig_width = max(min_width, max(1, n_ops) * width_per_op)
 
-    tree_image_path = _render_datafusion_tree_image(parsed, graphviz_dpi=(graphviz_dpi or dpi))
+    tree_img = _render_datafusion_tree_array(parsed, graphviz_dpi=(graphviz_dpi or dpi))
 
     fig = plt.figure(figsize=(fig_width, height))
 
@@ -337,19 +369,17 @@ def generate_combined_visualization_datafusion(parsed: Dict[str, Any],
 
     # Bottom tree
     ax2 = plt.subplot(2, 1, 2)
-    tree_img = mpimg.imread(tree_image_path)
     ax2.imshow(tree_img)
     ax2.axis('off')
     ax2.set_title('Query Operator Tree')
 
     plt.tight_layout()
-    plt.savefig(output_filename, dpi=dpi)
+    # Hand PNG encoding to Pillow at zlib level 1: much faster at high DPI for slightly larger files
+    # (pil_kwargs needs Matplotlib >= 3.4).
+    fig.savefig(output_filename, dpi=dpi, pil_kwargs={'compress_level': 1, 'optimize': False})
     print(f"Successfully generated combined query analysis: {output_filename}")
     plt.close(fig)
 
-    if os.path.exists(tree_image_path):
-        os.remove(tree_image_path)
-
 
 # Public alias mirroring your Snowflake function name pattern
 def _render_datafusion_tree_image_public(parsed: Dict[str, Any], graphviz_dpi: int = 192) -> str:
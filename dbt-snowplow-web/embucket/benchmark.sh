@@ -38,7 +38,7 @@ source env/bin/activate
 source env/bin/activate
 
 pip install -U pip setuptools wheel
-pip install playwright
+pip install playwright orjson ijson
 python -m playwright install chromium
 
 # Step 2: Generate test data
@@ -118,13 +118,14 @@ set +a
 env/bin/python3 ../enrich_run_results.py \
   --manifest dbt-snowplow-web/target/manifest.json \
   --run-results run_results_first_run.json \
-  --output run_results_first_run_enriched.json
+  --sidecar run_results_first_run_row_counts.json
 
 # Generate lineage visualization for first run
 echo "Generating lineage visualization for first run..."
 python3 ../visualize_lineage.py \
   --manifest dbt-snowplow-web/target/manifest.json \
-  --run-results run_results_first_run_enriched.json \
+  --run-results run_results_first_run.json \
+  --row-counts run_results_first_run_row_counts.json \
   --output lineage_first_run.html \
   --title "dbt-snowplow-web First Run - Embucket" \
   --row-label "Rows Created"
@@ -184,7 +185,7 @@ echo "✓ Lineage visualization saved to: lineage_incremental_run.html"
 
 # Cleanup temporary files
 cd ..
-rm -f run_results_first_run.json run_results_first_run_enriched.json run_results_incremental_run.json
+rm -f run_results_first_run.json run_results_first_run_row_counts.json run_results_incremental_run.json
 cd dbt-snowplow-web
 
 # Generate screenshots for README
@@ -11,24 +11,133 @@ Usage:
 
 import os
 import sys
+import time
+import logging
+import types
+import uuid
+import zlib
+import socket
+import http.client
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+from urllib3.exceptions import NewConnectionError
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
+from urllib.parse import urlencode, urlsplit
 
 
-def authenticate(base_url, username='embucket', password='embucket'):
+# Read size for streaming CSV bodies to the socket
+UPLOAD_CHUNK_SIZE = 1 << 16
+
+# (connect, read) timeouts in seconds: fail fast on dead hosts, stay patient with slow servers
+CONNECT_TIMEOUT = 5
+QUERY_READ_TIMEOUT = 120
+UPLOAD_READ_TIMEOUT = 600
+
+# Upper bound on requests in flight at once (uploads, schema drops); also sizes the connection pool
+DEFAULT_CONCURRENCY = 8
+
+# Extra attempts for an upload whose connection failed before the server could accept it,
+# waiting UPLOAD_RETRY_BACKOFF seconds before the first and doubling each time
+UPLOAD_RETRIES = 2
+UPLOAD_RETRY_BACKOFF = 0.5
+
+JSON_HEADERS = types.MappingProxyType({'Content-Type': 'application/json'})
+
+# CSV format parameters for the upload endpoint
+UPLOAD_PARAMS = types.MappingProxyType({
+    "header": "true",        # CSV has header row
+    "delimiter": "44",       # Comma (ASCII 44)
+})
+
+log = logging.getLogger('load_events')
+
+
+# Disable Nagle (no delayed-ACK stalls on small requests) and enlarge the send buffer for uploads.
+# urllib3's defaults already include TCP_NODELAY; listing it keeps the raw zero-copy socket in sync.
+SOCKET_OPTIONS = [
+    opt for opt in HTTPConnection.default_socket_options
+    if opt[:2] != (socket.IPPROTO_TCP, socket.TCP_NODELAY)
+] + [
+    (socket.IPPROTO_TCP, socket.TCP_NODELAY, 1),
+    (socket.SOL_SOCKET, socket.SO_SNDBUF, 1 << 20),
+]
+
+
+class TunedHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter whose pooled connections are opened with SOCKET_OPTIONS."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs['socket_options'] = SOCKET_OPTIONS
+        super().init_poolmanager(*args, **kwargs)
+
+
+def endpoint_urls(base_url):
+    """Precompute the Embucket endpoint URLs once base_url is final."""
+    return types.SimpleNamespace(
+        base=base_url,
+        login=f"{base_url}/ui/auth/login",
+        queries=f"{base_url}/ui/queries",
+        upload=f"{base_url}/ui/databases/{{db}}/schemas/{{sc}}/tables/{{tb}}/rows",
+    )
+
+
+def create_session(base_url, max_workers=DEFAULT_CONCURRENCY):
+    """Create a pooled HTTP session so every call reuses keep-alive connections to Embucket.
+
+    The endpoint URLs are attached as `session.urls`. Row uploads go through their own
+    adapter without retries; upload_csv_via_http retries failed connects itself.
+    """
+    retry = Retry(
+        total=3,
+        read=0,  # never replay a request the server may already have processed
+        backoff_factor=0.5,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset(['POST', 'GET']),
+    )
+    # Uploads append rows: a 502/503/504 (e.g. a proxy timing out) can arrive after the server
+    # applied them, and a gzip body is a generator that cannot be rewound. upload_csv_via_http
+    # retries failed connects for both upload paths, so this adapter doesn't retry at all
+    pool_maxsize = max(16, max_workers)
+    adapter = TunedHTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize, max_retries=retry)
+    upload_adapter = TunedHTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize, max_retries=0)
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.urls = endpoint_urls(base_url)
+    # requests picks the adapter with the longest matching prefix
+    session.mount(session.urls.upload.split('{', 1)[0], upload_adapter)
+    return session
+
+
+def post_query(session, query, timeout=(CONNECT_TIMEOUT, QUERY_READ_TIMEOUT)):
+    """POST one SQL query to Embucket's /ui/queries endpoint, serializing the body with orjson."""
+    return session.post(
+        session.urls.queries,
+        headers=JSON_HEADERS,
+        data=orjson.dumps({"query": query}),
+        timeout=timeout
+    )
+
+
+def authenticate(session, username='embucket', password='embucket'):
     """Authenticate with Embucket and get access token."""
     print(f"🔐 Authenticating with Embucket...")
     
     try:
-        response = requests.post(
-            f"{base_url}/ui/auth/login",
-            headers={'Content-Type': 'application/json'},
-            json={"username": username, "password": password},
-            timeout=10
+        response = session.post(
+            session.urls.login,
+            headers=JSON_HEADERS,
+            data=orjson.dumps({"username": username, "password": password}),
+            timeout=(CONNECT_TIMEOUT, 30)
         )
         response.raise_for_status()
         
-        data = response.json()
+        data = orjson.loads(response.content)
         access_token = data.get('accessToken')
         
         if not access_token:
@@ -39,7 +148,7 @@ def authenticate(base_url, username='embucket', password='embucket'):
         return access_token
         
     except requests.exceptions.ConnectionError:
-        print(f"✗ Error: Cannot connect to {base_url}")
+        print(f"✗ Error: Cannot connect to {session.urls.base}")
         print("  Is Embucket running? Check the URL and port.")
         sys.exit(1)
     except requests.exceptions.Timeout:
@@ -50,72 +159,137 @@ def authenticate(base_url, username='embucket', password='embucket'):
         sys.exit(1)
 
 
-def run_sql_file(base_url, headers, sql_file_path):
-    """Run a SQL file to set up database, schema, and table."""
-    print(f"\n📊 Running SQL setup file: {sql_file_path}")
+def split_sql_statements(sql):
+    """Split a SQL script into statements in a single pass.
+
+    Tracks quote and comment state so `;` or `--` inside string literals don't split or truncate
+    a statement. Comments between statements are dropped; each statement keeps its trailing `;`.
+    """
+    statements = []
+    n = len(sql)
+    i = 0
+    start = None  # index where the current statement's first real token begins
+    quote = None
+    while i < n:
+        c = sql[i]
+        if quote:
+            if c == quote:
+                quote = None
+        elif c == '-' and sql.startswith('--', i):
+            end = sql.find('\n', i)
+            i = n if end == -1 else end
+            continue
+        elif c == '/' and sql.startswith('/*', i):
+            end = sql.find('*/', i + 2)
+            i = n if end == -1 else end + 2
+            continue
+        elif c in ("'", '"'):
+            quote = c
+            if start is None:
+                start = i
+        elif c == ';':
+            if start is not None:
+                statements.append(sql[start:i + 1].strip())
+                start = None
+        elif start is None and not c.isspace():
+            start = i
+        i += 1
+
+    # Add any remaining statement without a trailing semicolon
+    if start is not None:
+        tail = sql[start:].strip()
+        if tail:
+            statements.append(tail)
+    return statements
 
+
+def _run_statements_batched(session, statements):
+    """Send all statements as a single multi-statement query. Returns False if the server rejects it.
+
+    A 200 only shows the request was accepted, not that every statement ran, so this is opt-in
+    (--batch-setup) and the caller checks the target table afterwards.
+    """
+    if len(statements) < 2:
+        return False
+    
+    print(f"   Executing {len(statements)} statements in a single request...")
     try:
-        with open(sql_file_path, 'r') as f:
-            sql_content = f.read()
+        response = post_query(session, "\n".join(statements))
+    except Exception as e:
+        print(f"   ⚠ Batched execution failed ({str(e)[:50]}), running statements one by one")
+        return False
+    
+    if response.status_code in [200, 201]:
+        print(f"       ✓ Accepted")
+        return True
+    
+    # Setup statements are idempotent, so replaying them individually after a partial run is safe
+    print(f"   ⚠ Batched execution not accepted (status: {response.status_code}), running statements one by one")
+    return False
+
+
+def _run_statements_individually(session, statements):
+    """Execute statements one request at a time, continuing past individual failures.
+
+    Per-statement progress is logged at DEBUG (shown with --verbose); failures are always shown.
+    """
+    total = len(statements)
+    succeeded = 0
+    for i, statement in enumerate(statements, 1):
+        if not statement:
+            continue
+        
+        # Show what we're executing
+        statement_preview = statement[:60].replace('\n', ' ')
+        log.debug(f"   [{i}/{total}] {statement_preview}...")
+            
+        try:
+            response = post_query(session, statement)
+            
+            if response.status_code in [200, 201]:
+                log.debug(f"       ✓ Success")
+                succeeded += 1
+            else:
+                log.warning(f"   ⚠ [{i}/{total}] {statement_preview}... Status: {response.status_code}")
+                # Continue with next statement
+        except requests.exceptions.Timeout:
+            log.warning(f"   ⚠ [{i}/{total}] {statement_preview}... Timeout after {QUERY_READ_TIMEOUT}s")
+            # Continue with next statement
+        except Exception as e:
+            log.warning(f"   ⚠ [{i}/{total}] {statement_preview}... Error: {str(e)[:50]}")
+            # Continue with next statement
+    
+    print(f"   {succeeded}/{total} statements succeeded")
 
-        # Replace database name placeholder with actual database name from environment
-        database = os.getenv("EMBUCKET_DATABASE", "embucket")
-        sql_content = sql_content.replace('{DATABASE_NAME}', database)
 
-        # Split into individual statements and execute them one by one
-        statements = []
-        current_statement = ""
+def run_sql_file(session, sql_file_path, database, schema, table_name, batched=False):
+    """Run a SQL file to set up database, schema, and table.
 
-        for line in sql_content.split('\n'):
-            # Skip comments and empty lines
-            line_stripped = line.strip()
-            if not line_stripped or line_stripped.startswith('--'):
-                continue
+    With batched, the whole script is sent in one request first; if the target table is
+    missing afterwards, the statements are replayed one by one.
+    """
+    print(f"\n📊 Running SQL setup file: {sql_file_path}")
 
-            current_statement += line + "\n"
+    try:
+        # Explicit encoding so the script reads the same regardless of platform locale
+        sql_content = Path(sql_file_path).read_text(encoding='utf-8')
 
-            # If line ends with semicolon, it's end of statement
-            if line_stripped.endswith(';'):
-                statements.append(current_statement.strip())
-                current_statement = ""
+        # Replace database name placeholder with the configured database name
+        sql_content = sql_content.replace('{DATABASE_NAME}', database)
 
-        # Add any remaining statement
-        if current_statement.strip():
-            statements.append(current_statement.strip())
+        # Split into individual statements
+        statements = split_sql_statements(sql_content)
         
         print(f"   Found {len(statements)} SQL statements to execute")
         
-        # Execute each statement
-        for i, statement in enumerate(statements, 1):
-            if not statement:
-                continue
-            
-            # Show what we're executing
-            statement_preview = statement[:60].replace('\n', ' ')
-            print(f"   [{i}/{len(statements)}] {statement_preview}...")
-                
-            try:
-                # Use longer timeout for CREATE TABLE (large statement)
-                timeout = 60 if 'CREATE TABLE' in statement else 30
-                
-                response = requests.post(
-                    f"{base_url}/ui/queries",
-                    headers={**headers, 'Content-Type': 'application/json'},
-                    json={"query": statement},
-                    timeout=timeout
-                )
-                
-                if response.status_code in [200, 201]:
-                    print(f"       ✓ Success")
-                else:
-                    print(f"       ⚠ Status: {response.status_code}")
-                    # Continue with next statement
-            except requests.exceptions.Timeout:
-                print(f"       ⚠ Timeout after {timeout}s")
-                # Continue with next statement
-            except Exception as e:
-                print(f"       ⚠ Error: {str(e)[:50]}")
-                # Continue with next statement
+        # Optionally try the whole script in one round-trip; fall back to one request per statement.
+        # A 200 doesn't prove every statement ran, so the batch only counts if the table exists
+        ran_batched = batched and _run_statements_batched(session, statements)
+        if ran_batched and not table_exists(session, database, schema, table_name):
+            print(f"   ⚠ {database}.{schema}.{table_name} missing after batched execution, running statements one by one")
+            ran_batched = False
+        if not ran_batched:
+            _run_statements_individually(session, statements)
         
         print(f"✓ Database, schema, and table setup complete")
         return True
@@ -128,129 +302,385 @@ def run_sql_file(base_url, headers, sql_file_path):
         return False
 
 
-def upload_csv_via_http(base_url, headers, local_file, database, schema, table_name):
-    """Upload CSV file directly via HTTP API - no file transfer to EC2 needed!"""
-    file_name = Path(local_file).name
-    file_size = os.path.getsize(local_file)
-    file_size_mb = file_size / (1024 * 1024)
+@dataclass(frozen=True)
+class FileMeta:
+    """A CSV file to upload, stat'ed once up front."""
+    path: str
+    name: str
+    size: int
+
+    @classmethod
+    def from_path(cls, path):
+        """Raises FileNotFoundError if `path` does not exist."""
+        st = os.stat(path)
+        return cls(path=str(path), name=os.path.basename(path), size=st.st_size)
+
+
+class CsvFileStream:
+    """File-like request body that streams a CSV from disk in fixed-size chunks.
+
+    By default the file is wrapped as a multipart/form-data `file` field; with multipart=False
+    the raw CSV bytes are the whole body (Content-Type: text/csv).
+    The total length is known up front so requests sends a Content-Length header instead of
+    buffering the whole encoded body in memory. read(size) returns at most size bytes;
+    tell()/seek(0) let urllib3 rewind on retry.
+    """
+
+    def __init__(self, file_meta, multipart=True, field_name='file', content_type='text/csv'):
+        if multipart:
+            boundary = uuid.uuid4().hex
+            self.content_type = f'multipart/form-data; boundary={boundary}'
+            self.preamble = (
+                f'--{boundary}\r\n'
+                f'Content-Disposition: form-data; name="{field_name}"; filename="{file_meta.name}"\r\n'
+                f'Content-Type: {content_type}\r\n\r\n'
+            ).encode('utf-8')
+            self.trailer = f'\r\n--{boundary}--\r\n'.encode('utf-8')
+        else:
+            self.content_type = content_type
+            self.preamble = b''
+            self.trailer = b''
+        self.local_file = file_meta.path
+        self._file_size = file_meta.size
+        self._file = None
+        self._pos = 0
+
+    def __len__(self):
+        return len(self.preamble) + self._file_size + len(self.trailer)
+
+    def __iter__(self):
+        while True:
+            chunk = self.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+    def _read_part(self, size):
+        """Read up to size bytes from whichever of preamble, file and trailer holds self._pos."""
+        pos = self._pos
+        if pos < len(self.preamble):
+            return self.preamble[pos:pos + size]
+        pos -= len(self.preamble)
+        if pos < self._file_size:
+            if self._file is None:
+                self._file = open(self.local_file, 'rb', buffering=UPLOAD_CHUNK_SIZE)
+            return self._file.read(min(size, self._file_size - pos))
+        pos -= self._file_size
+        return self.trailer[pos:pos + size]
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = len(self) - self._pos
+        chunks = []
+        while size > 0:
+            chunk = self._read_part(size)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            self._pos += len(chunk)
+            size -= len(chunk)
+        return chunks[0] if len(chunks) == 1 else b''.join(chunks)
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        if offset != 0 or whence != os.SEEK_SET:
+            raise OSError("CsvFileStream only supports rewinding to the start")
+        self.close()
+        self._pos = 0
+        return 0
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def gzip_stream(chunks, level=6):
+    """Gzip-compress an iterable of byte chunks on the fly (wbits=31 emits a gzip header)."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def _post_zerocopy(url, headers, params, body, timeout):
+    """POST a CsvFileStream over a raw socket, letting the kernel copy the file (sendfile).
+
+    Only for plain http:// endpoints. Returns a requests.Response so callers handle it uniformly.
+    """
+    parts = urlsplit(url)
+    target = f"{parts.path}?{urlencode(params)}" if params else parts.path
+    request_headers = {
+        'Host': parts.netloc,
+        **headers,
+        'Content-Type': body.content_type,
+        'Content-Length': str(len(body)),
+        'Connection': 'close',
+    }
+    head = f"POST {target} HTTP/1.1\r\n"
+    head += "".join(f"{k}: {v}\r\n" for k, v in request_headers.items())
+    head += "\r\n"
+
+    connect_timeout, read_timeout = timeout
+    try:
+        sock = socket.create_connection((parts.hostname, parts.port or 80), timeout=connect_timeout)
+    except OSError as e:
+        # Report connect failures the way requests does, so callers can tell them from later errors
+        raise requests.exceptions.ConnectionError(
+            NewConnectionError(parts.netloc, f"Failed to establish a new connection: {e}")
+        ) from e
+    with sock:
+        sock.settimeout(read_timeout)
+        for level, option, value in SOCKET_OPTIONS:
+            sock.setsockopt(level, option, value)
+        sock.sendall(head.encode('latin-1') + body.preamble)
+        with open(body.local_file, 'rb') as f:
+            # socket.sendfile() uses os.sendfile() and copes with the socket timeout
+            sock.sendfile(f)
+        sock.sendall(body.trailer)
+
+        raw = http.client.HTTPResponse(sock)
+        raw.begin()
+        response = requests.Response()
+        response.status_code = raw.status
+        response.reason = raw.reason
+        response.headers = requests.structures.CaseInsensitiveDict(raw.getheaders())
+        response._content = raw.read()
+        response.url = url
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        raw.close()
+    return response
+
+
+def _send_csv(session, upload_url, file_meta, compress=False, zerocopy=False, multipart=True):
+    """Send one CSV upload request and return the response."""
+    # Stream the body from disk instead of encoding it in memory
+    body = CsvFileStream(file_meta, multipart=multipart)
+    try:
+        if zerocopy:
+            # Only the auth header applies: the raw response reader can't decode Accept-Encoding
+            auth_headers = {k: v for k, v in session.headers.items() if k.lower() == 'authorization'}
+            return _post_zerocopy(upload_url, auth_headers, UPLOAD_PARAMS, body,
+                                  timeout=(CONNECT_TIMEOUT, UPLOAD_READ_TIMEOUT))
+        upload_headers = {'Content-Type': body.content_type}
+        data = body
+        if compress:
+            upload_headers['Content-Encoding'] = 'gzip'
+            data = gzip_stream(body)
+        return session.post(
+            upload_url,
+            headers=upload_headers,
+            params=UPLOAD_PARAMS,
+            data=data,
+            timeout=(CONNECT_TIMEOUT, UPLOAD_READ_TIMEOUT)
+        )
+    finally:
+        body.close()
+
+
+def _failed_before_send(error):
+    """True if a request failed while connecting, i.e. before any of its body reached the server."""
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    if not isinstance(error, requests.exceptions.ConnectionError) or not error.args:
+        return False
+    # requests wraps urllib3's MaxRetryError, whose reason is the underlying error
+    reason = getattr(error.args[0], 'reason', error.args[0])
+    return isinstance(reason, NewConnectionError)
+
+
+def upload_csv_via_http(session, file_meta, database, schema, table_name, emit=print,
+                        compress=False, zerocopy=False, multipart=True):
+    """Upload CSV file directly via HTTP API - no file transfer to EC2 needed!
+
+    `emit` receives each output line; parallel uploads pass a buffer so output stays grouped per file.
+    With `compress`, the body is sent gzip-encoded (Content-Encoding: gzip, chunked transfer);
+    the Embucket server must accept gzip request bodies for this to work.
+    With `zerocopy` and a plain http:// endpoint, the file is handed to the socket with sendfile().
+    With `multipart=False`, the raw CSV is POSTed as the body (the endpoint must accept text/csv).
+    """
+    file_size_mb = file_meta.size / (1024 * 1024)
     
-    print(f"\n📤 Uploading via HTTP API...")
-    print(f"   File: {file_name} ({file_size_mb:.2f} MB)")
-    print(f"   Target: {database}.{schema}.{table_name}")
-    print(f"   Endpoint: {base_url}")
+    emit(f"\n📤 Uploading via HTTP API...")
+    emit(f"   File: {file_meta.name} ({file_size_mb:.2f} MB)")
+    emit(f"   Target: {database}.{schema}.{table_name}")
+    emit(f"   Endpoint: {session.urls.base}")
     
     # API endpoint for file upload
-    upload_url = f"{base_url}/ui/databases/{database}/schemas/{schema}/tables/{table_name}/rows"
+    upload_url = session.urls.upload.format(db=database, sc=schema, tb=table_name)
     
-    # CSV format parameters
-    params = {
-        "header": "true",        # CSV has header row
-        "delimiter": "44",       # Comma (ASCII 44)
-    }
+    if zerocopy and (compress or not upload_url.startswith('http://')):
+        emit("   ⚠ Zero-copy upload needs plain HTTP without gzip, using the streaming upload instead")
+        zerocopy = False
     
     try:
-        # Open and upload file
-        with open(local_file, 'rb') as f:
-            files = {"file": (file_name, f, "text/csv")}
-            
-            response = requests.post(
-                upload_url,
-                headers=headers,
-                params=params,
-                files=files,
-                timeout=300  # 5 minutes for large files
-            )
+        for attempt in range(UPLOAD_RETRIES + 1):
+            try:
+                response = _send_csv(session, upload_url, file_meta,
+                                     compress=compress, zerocopy=zerocopy, multipart=multipart)
+                break
+            except requests.exceptions.RequestException as e:
+                # Only retry failed connects: once the body is sent the server may have appended the
+                # rows even if no response arrives, and a re-upload would duplicate them
+                if attempt == UPLOAD_RETRIES or not _failed_before_send(e):
+                    raise
+                emit(f"   ⚠ Connection failed ({str(e)[:80]}), retrying upload ({attempt + 1}/{UPLOAD_RETRIES})...")
+                time.sleep(UPLOAD_RETRY_BACKOFF * 2 ** attempt)
         
         response.raise_for_status()
         
-        data = response.json()
+        data = orjson.loads(response.content)
         rows_loaded = data.get('count', 0)
         duration_ms = data.get('duration_ms', 0)
         duration_sec = duration_ms / 1000
         
-        print(f"✓ Upload complete!")
-        print(f"   Rows loaded: {rows_loaded:,}")
-        print(f"   Duration: {duration_sec:.2f} seconds")
+        emit(f"✓ Upload complete!")
+        emit(f"   Rows loaded: {rows_loaded:,}")
+        emit(f"   Duration: {duration_sec:.2f} seconds")
         
         return rows_loaded
         
     except requests.exceptions.HTTPError as e:
-        print(f"✗ HTTP Error: {e}")
-        print(f"  Response: {e.response.text[:500]}")
+        emit(f"✗ HTTP Error: {e}")
+        emit(f"  Response: {e.response.text[:500]}")
         sys.exit(1)
     except Exception as e:
-        print(f"✗ Upload failed: {e}")
+        emit(f"✗ Upload failed: {e}")
         sys.exit(1)
 
 
-def drop_schemas(base_url, headers, database):
-    """Drop the specified schemas."""
+def _drop_schema(session, database, schema):
+    """Drop one schema and return the status line to print."""
+    try:
+        query = f"DROP SCHEMA IF EXISTS {database}.{schema} CASCADE"
+        response = post_query(session, query)
+        if response.status_code in [200, 201]:
+            return f"✓ Schema {database}.{schema} dropped successfully"
+        return f"⚠ Warning: Could not drop schema {database}.{schema} (status: {response.status_code})"
+    except Exception as e:
+        return f"⚠ Warning: Could not drop schema {database}.{schema}: {e}"
+
+
+def drop_schemas(session, database, max_workers=DEFAULT_CONCURRENCY):
+    """Drop the specified schemas concurrently (they are independent DDL)."""
     schemas_to_drop = ['PUBLIC_DERIVED', 'PUBLIC_SCRATCH', 'PUBLIC_SNOWPLOW_MANIFEST']
     
     for schema in schemas_to_drop:
-        try:
-            print(f"Dropping schema {database}.{schema}...")
-            query = f"DROP SCHEMA IF EXISTS {database}.{schema} CASCADE"
-            response = requests.post(
-                f"{base_url}/ui/queries",
-                headers={**headers, 'Content-Type': 'application/json'},
-                json={"query": query},
-                timeout=30
-            )
-            if response.status_code in [200, 201]:
-                print(f"✓ Schema {database}.{schema} dropped successfully")
-            else:
-                print(f"⚠ Warning: Could not drop schema {database}.{schema} (status: {response.status_code})")
-        except Exception as e:
-            print(f"⚠ Warning: Could not drop schema {database}.{schema}: {e}")
+        print(f"Dropping schema {database}.{schema}...")
+    
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(schemas_to_drop)))) as executor:
+        results = executor.map(lambda schema: _drop_schema(session, database, schema),
+                               schemas_to_drop)
+        for line in results:
+            print(line)
 
 
-def load_multiple_files(base_url, headers, files, database, schema, table_name):
-    """Load multiple CSV files sequentially without creating a combined file."""
+def _upload_buffered(session, file_meta, database, schema, table_name, compress=False,
+                     zerocopy=False, multipart=True):
+    """Run one upload, collecting its output lines instead of printing them immediately."""
+    lines = [f"\n📤 Loading {file_meta.name}..."]
+    try:
+        rows_loaded = upload_csv_via_http(session, file_meta, database, schema, table_name,
+                                          emit=lines.append, compress=compress, zerocopy=zerocopy,
+                                          multipart=multipart)
+    except SystemExit:
+        # Surface the failure details right away; the main thread re-raises via future.result()
+        print("\n".join(lines))
+        raise
+    return rows_loaded, lines
+
+
+def load_multiple_files(session, files, database, schema, table_name, compress=False,
+                        zerocopy=False, multipart=True, max_workers=DEFAULT_CONCURRENCY):
+    """Load multiple CSV files (FileMeta) in parallel, one connection per file, without combining them."""
     total_rows_loaded = 0
     
-    for file in files:
-        file_path = Path(file)
-        if not file_path.exists():
-            print(f"⚠ Warning: File {file} not found, skipping...")
-            continue
-        
-        print(f"\n📤 Loading {file_path.name}...")
-        rows_loaded = upload_csv_via_http(base_url, headers, str(file_path), database, schema, table_name)
-        total_rows_loaded += rows_loaded
+    if files:
+        # Network I/O releases the GIL, so threads are enough to stream the uploads concurrently
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(files)))) as executor:
+            futures = [
+                executor.submit(_upload_buffered, session, file_meta, database, schema,
+                                table_name, compress, zerocopy, multipart)
+                for file_meta in files
+            ]
+            # Print in submission order so the log reads the same as a sequential run
+            for future in futures:
+                rows_loaded, lines = future.result()
+                print("\n".join(lines))
+                total_rows_loaded += rows_loaded
     
     print(f"\n✓ Total rows loaded: {total_rows_loaded:,}")
     return total_rows_loaded
 
 
-def verify_data(base_url, headers, database, schema, table_name):
-    """Query the table to verify data was loaded."""
+def first_result_value(response):
+    """Return the first cell of a /ui/queries result, or None if the payload has no rows."""
+    payload = orjson.loads(response.content)
+    record = payload.get('data', payload) if isinstance(payload, dict) else {}
+    result = record.get('result') or {}
+    if isinstance(result, (str, bytes)):
+        result = orjson.loads(result)
+    rows = result.get('rows') or []
+    if rows and rows[0]:
+        return rows[0][0]
+    return None
+
+
+def table_exists(session, database, schema, table_name):
+    """Cheap information_schema probe for the target table. Returns False if the probe fails."""
+    query = (
+        f"SELECT 1 FROM {database}.information_schema.tables "
+        f"WHERE LOWER(table_schema) = '{schema.lower()}' AND LOWER(table_name) = '{table_name.lower()}' LIMIT 1"
+    )
+    try:
+        response = post_query(session, query, timeout=(CONNECT_TIMEOUT, 10))
+        return response.status_code in [200, 201] and first_result_value(response) is not None
+    except Exception:
+        return False
+
+
+def verify_data(session, database, schema, table_name, expected_rows=None):
+    """Query the table to verify data was loaded.
+
+    Uses a plain COUNT(*) (cheap) rather than COUNT(DISTINCT ...) aggregates, and compares it
+    with the row count reported by the uploads.
+    """
     print(f"\n🔍 Verifying data...")
     
-    query = f"""
-    SELECT 
-        COUNT(*) as total_rows,
-        COUNT(DISTINCT event_id) as unique_events,
-        COUNT(DISTINCT user_id) as unique_users
-    FROM {database}.{schema}.{table_name}
-    """
+    query = f"SELECT COUNT(*) FROM {database}.{schema}.{table_name}"
     
     try:
-        response = requests.post(
-            f"{base_url}/ui/queries",
-            headers={**headers, 'Content-Type': 'application/json'},
-            json={"query": query},
-            timeout=30
-        )
+        response = post_query(session, query)
         response.raise_for_status()
         
-        print("✓ Data verified successfully")
-        # Note: Full result parsing would require parsing the response structure
+        total_rows = first_result_value(response)
+        if total_rows is None:
+            print("✓ Data verified successfully")
+        elif expected_rows is not None and int(total_rows) != expected_rows:
+            print(f"⚠ Table has {int(total_rows):,} rows but uploads reported {expected_rows:,}")
+        else:
+            print(f"✓ Data verified successfully ({int(total_rows):,} rows)")
         
     except Exception as e:
         print(f"⚠ Could not verify data: {e}")
 
 
+def normalize_base_url(host, port='3000'):
+    """Turn a host, host:port or full URL into an Embucket base URL."""
+    if '://' in host:
+        # Full URL provided (e.g., http://localhost:3000)
+        return host.rstrip('/')
+    if ':' in host:
+        # Host with port (e.g., localhost:3000)
+        return f'http://{host}'
+    # Just host, need to add port
+    return f'http://{host}:{port}'
+
+
 def print_usage():
     """Print usage information."""
     print("Usage:")
@@ -271,6 +701,13 @@ def print_usage():
     print("  --database <name>    Database (default: embucket)")
     print("  --schema <name>      Schema (default: atomic)")
     print("  --table <name>       Table (default: events)")
+    print(f"  --concurrency <n>    Max parallel uploads/schema drops (default: {DEFAULT_CONCURRENCY})")
+    print("  --gzip               Gzip-compress CSV uploads on the wire (server must accept gzip bodies)")
+    print("  --zerocopy           Send CSV files with sendfile() over a raw socket (http:// only)")
+    print("  --raw-body           POST the raw CSV as text/csv instead of multipart/form-data")
+    print("  --force-setup        Always replay create.sql, even if the table exists (incremental run)")
+    print("  --batch-setup        Send create.sql in one multi-statement request (falls back if the table is missing)")
+    print("  -v, --verbose        Print each SQL statement as it runs")
     print()
     print("Examples:")
     print("  python load_events.py --yesterday    # First run: load yesterday's data")
@@ -289,6 +726,12 @@ def main():
     
     # Parse command line arguments
     mode = None
+    compress = False
+    zerocopy = False
+    multipart = True
+    force_setup = False
+    batch_setup = False
+    verbose = False
     args = sys.argv[1:]
     
     for arg in args:
@@ -299,6 +742,21 @@ def main():
             mode = 'yesterday'
         elif arg == '--combined':
             mode = 'combined'
+        elif arg == '--gzip':
+            compress = True
+        elif arg == '--zerocopy':
+            zerocopy = True
+        elif arg == '--raw-body':
+            multipart = False
+        elif arg == '--force-setup':
+            force_setup = True
+        elif arg == '--batch-setup':
+            batch_setup = True
+        elif arg in ['-v', '--verbose']:
+            verbose = True
+    
+    logging.basicConfig(level=logging.INFO, format='%(message)s', stream=sys.stdout)
+    log.setLevel(logging.DEBUG if verbose else logging.INFO)
     
     if not mode:
         print("Error: Must specify either --yesterday or --combined")
@@ -318,40 +776,29 @@ def main():
     
     script_dir = Path(__file__).parent
     parent_dir = script_dir.parent
-    input_files = [str(parent_dir / file) for file in input_files]
     
-    # Check if required files exist
-    for file in input_files:
-        if not Path(file).exists():
-            print(f"Error: {file} not found")
-            sys.exit(1)
+    # Stat each required file once; name and size are reused for the upload
+    try:
+        input_files = [FileMeta.from_path(parent_dir / file) for file in input_files]
+    except FileNotFoundError as e:
+        print(f"Error: {e.filename} not found")
+        sys.exit(1)
     
     # Handle EMBUCKET_HOST and EMBUCKET_PORT separately (if set)
-    host = os.getenv('EMBUCKET_HOST', 'localhost')
-    port = os.getenv('EMBUCKET_PORT', '3000')
-    
-    # Check if host already includes port or is a full URL
-    if '://' in host:
-        # Full URL provided (e.g., http://localhost:3000)
-        base_url = host.rstrip('/')
-    elif ':' in host:
-        # Host with port (e.g., localhost:3000)
-        base_url = f'http://{host}'
-    else:
-        # Just host, need to add port
-        base_url = f'http://{host}:{port}'
+    base_url = normalize_base_url(os.getenv('EMBUCKET_HOST', 'localhost'), os.getenv('EMBUCKET_PORT', '3000'))
     
     username = os.getenv('EMBUCKET_USER', 'embucket')
     password = os.getenv('EMBUCKET_PASSWORD', 'embucket')
     database = os.getenv('EMBUCKET_DATABASE', 'embucket')
     schema = 'atomic'
     table_name = 'events'
+    concurrency = DEFAULT_CONCURRENCY
     
     # Parse optional arguments
     i = 0
     while i < len(args):
         if args[i] == '--host' and i + 1 < len(args):
-            base_url = args[i + 1].rstrip('/')
+            base_url = normalize_base_url(args[i + 1])
             i += 2
         elif args[i] == '--user' and i + 1 < len(args):
             username = args[i + 1]
@@ -368,50 +815,66 @@ def main():
         elif args[i] == '--table' and i + 1 < len(args):
             table_name = args[i + 1]
             i += 2
+        elif args[i] == '--concurrency' and i + 1 < len(args):
+            concurrency = int(args[i + 1])
+            i += 2
         else:
             i += 1
     
-    # Ensure base_url from --host flag has proper scheme
-    if not base_url.startswith(('http://', 'https://')):
-        if ':' not in base_url:
-            # No port in URL, add default port
-            base_url = f'http://{base_url}:3000'
-        else:
-            # Has port
-            base_url = f'http://{base_url}'
-    
     print(f"\nConfiguration:")
-    print(f"  Files: {', '.join([Path(f).name for f in input_files])}")
+    print(f"  Files: {', '.join(f.name for f in input_files)}")
     print(f"  Embucket: {base_url}")
     print(f"  Target: {database}.{schema}.{table_name}")
+    print(f"  Compression: {'gzip' if compress else 'none'}")
+    print(f"  Zero-copy upload: {'yes' if zerocopy else 'no'}")
+    print(f"  Upload body: {'multipart/form-data' if multipart else 'raw text/csv'}")
     print(f"  Mode: {'Full run (will drop schemas)' if not is_incremental else 'Incremental run (preserves schemas)'}")
     print()
     
+    # One pooled session for every request below (saves a TCP handshake per call)
+    session = create_session(base_url, max_workers=concurrency)
+    
     # Step 1: Authenticate
-    access_token = authenticate(base_url, username, password)
-    headers = {'Authorization': f'Bearer {access_token}'}
+    access_token = authenticate(session, username, password)
+    # Set once on the session so no call has to merge auth into its own headers
+    session.headers.update({'Authorization': f'Bearer {access_token}'})
     
     # Step 2: Drop schemas unless this is an incremental run
     if not is_incremental:
         print("Full run: Dropping existing schemas...")
-        drop_schemas(base_url, headers, database)
+        drop_schemas(session, database, max_workers=concurrency)
     else:
         print("Incremental run: Skipping schema drop")
     
     # Step 3: Run SQL file to set up database, schema, and table
-    script_dir = Path(__file__).parent
-    sql_file = script_dir / "../create.sql"
+    sql_file = parent_dir / "create.sql"
+    
+    # create.sql drops and recreates the events table; when it already exists in an incremental
+    # run, emptying it gives the same starting state in one statement instead of replaying setup
+    setup_done = False
+    if is_incremental and not force_setup and table_exists(session, database, schema, table_name):
+        print(f"\n📊 Table {database}.{schema}.{table_name} exists, truncating instead of re-running setup")
+        try:
+            response = post_query(session, f"TRUNCATE TABLE {database}.{schema}.{table_name}")
+            setup_done = response.status_code in [200, 201]
+            if not setup_done:
+                print(f"   ⚠ Truncate failed (status: {response.status_code}), running full setup")
+        except requests.exceptions.RequestException as e:
+            print(f"   ⚠ Truncate failed ({e}), running full setup")
     
-    if not run_sql_file(base_url, headers, str(sql_file)):
+    if not setup_done and not run_sql_file(session, str(sql_file), database, schema, table_name,
+                                           batched=batch_setup):
         print("\n✗ Failed to run SQL setup file")
         print("Make sure ../create.sql exists in the same directory")
         sys.exit(1)
     
     # Step 4: Load multiple CSV files via HTTP
-    rows_loaded = load_multiple_files(base_url, headers, input_files, database, schema, table_name)
+    rows_loaded = load_multiple_files(session, input_files, database, schema, table_name,
+                                      compress=compress, zerocopy=zerocopy, multipart=multipart,
+                                      max_workers=concurrency)
     
     # Step 5: Verify
-    verify_data(base_url, headers, database, schema, table_name)
+    verify_data(session, database, schema, table_name, expected_rows=rows_loaded)
     
     # Summary
     print("\n" + "=" * 70)
@@ -7,12 +7,21 @@ in each table and updates the run_results.json file with accurate row counts. Th
 because rows_affected returns 1 for CREATE TABLE statements instead of the actual row count.
 """
 
-import json
 import os
+import re
 import sys
 import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import orjson
 import snowflake.connector
 
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
 
 def get_connection(provider):
     """
@@ -35,7 +44,9 @@ def get_connection(provider):
             schema=os.environ['EMBUCKET_SCHEMA']
         )
     elif provider == 'snowflake':
+        # qmark binds values server-side, so COUNT(*) text stays identical across tables
         return snowflake.connector.connect(
+            paramstyle='qmark',
             account=os.environ['SNOWFLAKE_ACCOUNT'],
             user=os.environ['SNOWFLAKE_USER'],
             password=os.environ['SNOWFLAKE_PASSWORD'],
@@ -58,99 +69,368 @@ def get_database_name(provider):
         raise ValueError(f"Unknown provider: {provider}. Must be 'embucket' or 'snowflake'")
 
 
-def get_table_row_count(conn, database, schema, table_name):
+# Identifiers that are safe to write unquoted (and resolve case-insensitively)
+_IDENT_RE = re.compile(r'^[A-Za-z_][A-Za-z0-9_$]*$')
+
+
+def _sql_identifier(name):
+    """Return a plain identifier as-is; double-quote anything else (spaces, quotes, dots, ...)."""
+    if _IDENT_RE.match(name):
+        return name
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _table_ref(database, schema, table_name, bind):
+    """
+    Return (sql, params) referencing a table.
+    
+    With bind=True (qmark connections) the qualified name is bound through IDENTIFIER(?),
+    so every query shares the same text; otherwise it is written into the SQL.
+    Plain identifiers are left unquoted so the database resolves their case; unusual
+    ones are quoted so they can't break or inject into the statement.
+    """
+    qualified_name = '.'.join(_sql_identifier(part) for part in (database, schema, table_name))
+    if bind:
+        return 'IDENTIFIER(?)', [qualified_name]
+    return qualified_name, []
+
+
+def get_table_row_count(cursor, database, schema, table_name, bind=False):
     """Query the database to get the actual row count for a table."""
-    cursor = conn.cursor()
     try:
         # Use COUNT(*) to get accurate row count
-        # Don't quote identifiers - will handle case sensitivity
-        query = f'SELECT COUNT(*) FROM {database}.{schema}.{table_name}'
-        cursor.execute(query)
+        table_sql, params = _table_ref(database, schema, table_name, bind)
+        cursor.execute(f'SELECT COUNT(*) FROM {table_sql}', params or None)
         result = cursor.fetchone()
         return result[0] if result else 0
     except Exception as e:
         print(f"Warning: Could not get row count for {schema}.{table_name}: {e}", file=sys.stderr)
         return None
-    finally:
-        cursor.close()
 
 
-def enrich_run_results(manifest_path, run_results_path, output_path, provider):
+def load_model_info(manifest_path):
+    """
+    Load {unique_id: (schema, table_name, materialized)} for the model nodes in manifest.json.
+    
+    With ijson installed the manifest is streamed: only the `nodes` section is parsed, one node
+    at a time (tests and other non-model nodes are built and then dropped), and the macros,
+    docs and sources sections are skipped. Otherwise the whole file is parsed with orjson.
+    """
+    with open(manifest_path, 'rb') as f:
+        if ijson is None:
+            nodes = orjson.loads(f.read())['nodes'].items()
+        else:
+            nodes = ijson.kvitems(f, 'nodes', use_float=True)
+        return {
+            unique_id: (
+                node['schema'],
+                node.get('alias') or node['name'],
+                node.get('config', {}).get('materialized', 'table'),
+            )
+            for unique_id, node in nodes
+            if unique_id.startswith('model.')
+        }
+
+
+def get_table_metadata(cursor, database, tables, bind=False):
+    """
+    Look up metadata for many tables at once from INFORMATION_SCHEMA.TABLES.
+    
+    ROW_COUNT is maintained as table metadata, so this needs no table scan and
+    takes a single round trip. Returns {(SCHEMA, TABLE): (row_count, last_altered)}
+    with upper-cased keys; row_count is None where the provider has no count
+    (views, or ROW_COUNT not populated). bind selects qmark placeholders.
+    """
+    if not tables:
+        return {}
+    schemas = sorted({schema for schema, _ in tables})
+    names = sorted({table_name for _, table_name in tables})
+    placeholder = '?' if bind else '%s'
+    query = (
+        f'SELECT TABLE_SCHEMA, TABLE_NAME, ROW_COUNT, LAST_ALTERED FROM {_sql_identifier(database)}.INFORMATION_SCHEMA.TABLES '
+        f'WHERE UPPER(TABLE_SCHEMA) IN ({", ".join([placeholder] * len(schemas))}) '
+        f'AND UPPER(TABLE_NAME) IN ({", ".join([placeholder] * len(names))})'
+    )
+    try:
+        cursor.execute(query, [s.upper() for s in schemas] + [n.upper() for n in names])
+        return {
+            (schema.upper(), table_name.upper()): (row_count, last_altered)
+            for schema, table_name, row_count, last_altered in cursor.fetchall()
+        }
+    except Exception as e:
+        print(f"Warning: Could not read table metadata from INFORMATION_SCHEMA: {e}", file=sys.stderr)
+        return {}
+
+
+def load_count_cache(cache_path):
+    """Load the row count cache: {fully_qualified_name: [last_altered, row_count]}."""
+    if not cache_path or not os.path.exists(cache_path):
+        return {}
+    try:
+        with open(cache_path, 'rb') as f:
+            return orjson.loads(f.read())
+    except (OSError, ValueError) as e:
+        print(f"Warning: Ignoring unreadable cache {cache_path}: {e}", file=sys.stderr)
+        return {}
+
+
+def save_count_cache(cache_path, cache):
+    """Write the row count cache atomically so an interrupted run can't truncate it."""
+    tmp_path = f"{cache_path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(orjson.dumps(cache, option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS))
+    os.replace(tmp_path, cache_path)
+
+
+# Tables counted per UNION ALL statement; keeps generated SQL well under parser limits
+COUNT_BATCH_SIZE = 50
+
+# Threads running COUNT(*) batches at once (non-Snowflake providers), each with its own cursor
+DEFAULT_COUNT_WORKERS = 8
+
+
+def _sql_string(value):
+    """Render a Python string as a single-quoted SQL literal."""
+    return "'" + value.replace("'", "''") + "'"
+
+
+def _batch_count_query(database, batch, bind):
+    """Build (sql, params) counting every table in batch with one UNION ALL statement."""
+    selects = []
+    params = []
+    for unique_id, schema, table_name in batch:
+        table_sql, table_params = _table_ref(database, schema, table_name, bind)
+        if bind:
+            selects.append(f'SELECT ? AS uid, COUNT(*) AS n FROM {table_sql}')
+            params += [unique_id] + table_params
+        else:
+            selects.append(f'SELECT {_sql_string(unique_id)} AS uid, COUNT(*) AS n FROM {table_sql}')
+    return ' UNION ALL '.join(selects), params
+
+
+def _count_individually(cursor, database, batch, bind):
+    """Count each table in batch with its own query, skipping any that fail."""
+    row_counts = {}
+    for unique_id, schema, table_name in batch:
+        row_count = get_table_row_count(cursor, database, schema, table_name, bind)
+        if row_count is not None:
+            row_counts[unique_id] = row_count
+    return row_counts
+
+
+def get_batch_row_counts(cursor, database, batch, bind=False):
+    """
+    Count several tables in one statement by combining COUNT(*) queries with UNION ALL.
+    
+    Args:
+        batch: List of (unique_id, schema, table_name) tuples
+        bind: Bind unique ids and table names as qmark parameters
+    
+    Returns {unique_id: row_count}. If the combined query fails (e.g. one table is
+    missing), the batch is recounted table by table so the others still get counts.
+    """
+    query, params = _batch_count_query(database, batch, bind)
+    try:
+        cursor.execute(query, params or None)
+        return {unique_id: row_count for unique_id, row_count in cursor.fetchall()}
+    except Exception:
+        return _count_individually(cursor, database, batch, bind)
+
+
+def get_batch_row_counts_async(cursor, database, batches, bind=False):
+    """
+    Submit every batch with execute_async, then collect the results (Snowflake only).
+    
+    All statements are queued on the server before the first result is fetched, so
+    they run concurrently without client-side threads. Failed batches are recounted
+    table by table like in get_batch_row_counts. Returns {unique_id: row_count}.
+    """
+    submitted = []
+    for batch in batches:
+        query, params = _batch_count_query(database, batch, bind)
+        try:
+            cursor.execute_async(query, params or None)
+            submitted.append((batch, cursor.sfqid))
+        except Exception:
+            submitted.append((batch, None))
+    
+    row_counts = {}
+    for batch, sfqid in submitted:
+        if sfqid is not None:
+            try:
+                cursor.get_results_from_sfqid(sfqid)
+                row_counts.update(cursor.fetchall())
+                continue
+            except Exception:
+                pass
+        row_counts.update(_count_individually(cursor, database, batch, bind))
+    return row_counts
+
+
+def enrich_run_results(manifest_path, run_results_path, output_path, provider, exact=False, cache_path=None,
+                       sidecar_path=None, include_views=False, max_workers=DEFAULT_COUNT_WORKERS):
     """
     Enrich run_results.json with actual row counts from the database.
     
     Args:
         manifest_path: Path to manifest.json
         run_results_path: Path to run_results.json
-        output_path: Path to write enriched run_results.json
+        output_path: Path to write enriched run_results.json (unused when sidecar_path is set)
         provider: Either 'embucket' or 'snowflake'
+        exact: Always run COUNT(*) instead of trusting INFORMATION_SCHEMA row counts
+        cache_path: Optional JSON file caching COUNT(*) results by LAST_ALTERED
+        sidecar_path: Write only {unique_id: actual_row_count} here instead of a full
+            enriched copy of run_results.json
+        include_views: Also count views, whose COUNT(*) re-runs the view query
+        max_workers: Threads running COUNT(*) batches concurrently (ignored for Snowflake,
+            which runs them as async queries)
     """
-    # Load manifest and run_results
-    with open(manifest_path, 'r') as f:
-        manifest = json.load(f)
+    # Load manifest models and run_results
+    model_info = load_model_info(manifest_path)
     
-    with open(run_results_path, 'r') as f:
-        run_results = json.load(f)
+    with open(run_results_path, 'rb') as f:
+        run_results = orjson.loads(f.read())
     
     # Connect to database
     provider_name = provider.capitalize()
     print(f"Connecting to {provider_name}...")
     conn = get_connection(provider)
+    cursor = conn.cursor()
     
     database = get_database_name(provider)
+    # Only the Snowflake connection uses qmark binding (see get_connection)
+    bind = provider == 'snowflake'
     
-    # Process each result
-    enriched_count = 0
+    # Collect the models to count
+    targets = []
     for result in run_results['results']:
         unique_id = result['unique_id']
         
-        # Only process models
-        if not unique_id.startswith('model.'):
+        # Only models are in model_info; skip tests, seeds, operations, etc.
+        info = model_info.get(unique_id)
+        if info is None:
             continue
         
-        # Get model info from manifest
-        if unique_id not in manifest['nodes']:
+        schema, table_name, materialized = info
+        # Ephemeral models have no relation, and counting a view executes its whole query
+        if materialized == 'ephemeral':
+            continue
+        if materialized == 'view' and not include_views:
             continue
+        targets.append((unique_id, schema, table_name))
+    
+    # Prefer metadata row counts, then cached counts for tables unchanged since they were
+    # cached; fall back to COUNT(*) for anything else (e.g. Embucket may leave ROW_COUNT
+    # empty). With --exact, metadata row counts are never trusted.
+    metadata = {}
+    if not exact or cache_path:
+        metadata = get_table_metadata(
+            cursor, database, [(schema, table_name) for _, schema, table_name in targets], bind
+        )
+    cache = load_count_cache(cache_path)
+    last_altered_by_name = {}
+    row_counts = {}
+    to_count = []
+    for unique_id, schema, table_name in targets:
+        row_count, last_altered = metadata.get((schema.upper(), table_name.upper()), (None, None))
+        qualified_name = f"{database}.{schema}.{table_name}".upper()
+        cached = cache.get(qualified_name)
+        if last_altered is not None:
+            last_altered = str(last_altered)
+            last_altered_by_name[qualified_name] = last_altered
         
-        model = manifest['nodes'][unique_id]
-        schema = model['schema']
-        table_name = model['alias'] if 'alias' in model else model['name']
+        if exact or row_count is None:
+            if cached and last_altered is not None and cached[0] == last_altered:
+                row_count = cached[1]
+            else:
+                to_count.append((unique_id, schema, table_name))
+                continue
+        row_counts[unique_id] = row_count
+        print(f"  {table_name}: {row_count:,} rows")
+    
+    # Count the rest in UNION ALL batches. Snowflake runs them as concurrent async queries
+    # from one cursor; otherwise batches are I/O-bound, so run them on a thread pool where
+    # each worker thread opens one cursor on the shared connection and reuses it.
+    table_names = {unique_id: table_name for unique_id, _, table_name in to_count}
+    batches = [to_count[i:i + COUNT_BATCH_SIZE] for i in range(0, len(to_count), COUNT_BATCH_SIZE)]
+    worker_cursors = []
+    if provider == 'snowflake':
+        for unique_id, row_count in get_batch_row_counts_async(cursor, database, batches, bind).items():
+            row_counts[unique_id] = row_count
+            print(f"  {table_names[unique_id]}: {row_count:,} rows")
+    else:
+        print_lock = threading.Lock()
+        worker_state = threading.local()
+        
+        def count_batch(batch):
+            if not hasattr(worker_state, 'cursor'):
+                worker_state.cursor = conn.cursor()
+                worker_cursors.append(worker_state.cursor)
+            return get_batch_row_counts(worker_state.cursor, database, batch, bind)
         
-        # Get actual row count from database
-        row_count = get_table_row_count(conn, database, schema, table_name)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(count_batch, batch) for batch in batches]
+            for future in as_completed(futures):
+                for unique_id, row_count in future.result().items():
+                    row_counts[unique_id] = row_count
+                    with print_lock:
+                        print(f"  {table_names[unique_id]}: {row_count:,} rows")
+    
+    # Remember fresh counts for tables whose LAST_ALTERED we know
+    if cache_path:
+        for unique_id, schema, table_name in to_count:
+            qualified_name = f"{database}.{schema}.{table_name}".upper()
+            if unique_id in row_counts and qualified_name in last_altered_by_name:
+                cache[qualified_name] = [last_altered_by_name[qualified_name], row_counts[unique_id]]
+        save_count_cache(cache_path, cache)
+    
+    for worker_cursor in worker_cursors:
+        worker_cursor.close()
+    cursor.close()
+    conn.close()
+    
+    if sidecar_path:
+        # Leave run_results.json untouched; consumers merge the counts themselves
+        with open(sidecar_path, 'wb') as f:
+            f.write(orjson.dumps(row_counts, option=orjson.OPT_INDENT_2))
         
+        print(f"\n✓ Counted rows for {len(row_counts)} models")
+        print(f"✓ Wrote row counts to: {sidecar_path}")
+        return
+    
+    # Add actual_row_count field
+    enriched_count = 0
+    for result in run_results['results']:
+        row_count = row_counts.get(result['unique_id'])
         if row_count is not None:
-            # Add actual_row_count field
             result['actual_row_count'] = row_count
             enriched_count += 1
-            print(f"  {table_name}: {row_count:,} rows")
-    
-    conn.close()
     
     # Write enriched run_results
-    with open(output_path, 'w') as f:
-        json.dump(run_results, f, indent=2)
+    with open(output_path, 'wb') as f:
+        f.write(orjson.dumps(run_results, option=orjson.OPT_INDENT_2))
     
     print(f"\n✓ Enriched {enriched_count} models with actual row counts")
     print(f"✓ Wrote enriched results to: {output_path}")
 
 
+# Environment variable whose presence identifies each provider's configuration
+PROVIDER_ENV_VARS = (
+    ('EMBUCKET_DATABASE', 'embucket'),
+    ('SNOWFLAKE_DATABASE', 'snowflake'),
+)
+
+
 def detect_provider():
     """
     Auto-detect provider by checking which environment variables are present.
     Returns 'embucket', 'snowflake', or None if ambiguous.
     """
-    has_embucket = 'EMBUCKET_DATABASE' in os.environ
-    has_snowflake = 'SNOWFLAKE_DATABASE' in os.environ
-    
-    if has_embucket and not has_snowflake:
-        return 'embucket'
-    elif has_snowflake and not has_embucket:
-        return 'snowflake'
-    elif has_embucket and has_snowflake:
-        return None  # Ambiguous - both are present
-    else:
-        return None  # Neither is present
+    providers = {
+        name for env_var, name in PROVIDER_ENV_VARS if env_var in os.environ
+    }
+    # Exactly one provider configured; otherwise ambiguous (both) or missing (neither)
+    return providers.pop() if len(providers) == 1 else None
 
 
 def main():
@@ -164,7 +444,33 @@ def main():
     )
     parser.add_argument('--manifest', required=True, help='Path to manifest.json')
     parser.add_argument('--run-results', required=True, help='Path to run_results.json')
-    parser.add_argument('--output', required=True, help='Path to write enriched run_results.json')
+    parser.add_argument(
+        '--include-views',
+        action='store_true',
+        help='Also count rows of models materialized as views (skipped by default)'
+    )
+    destination = parser.add_mutually_exclusive_group(required=True)
+    destination.add_argument('--output', help='Path to write enriched run_results.json')
+    destination.add_argument(
+        '--sidecar',
+        help='Path to write only {unique_id: actual_row_count}, leaving run_results.json as is '
+             '(used by the benchmark scripts; pass it to visualize_lineage.py --row-counts)'
+    )
+    parser.add_argument(
+        '--exact',
+        action='store_true',
+        help='Run COUNT(*) on every table instead of using INFORMATION_SCHEMA row counts'
+    )
+    parser.add_argument(
+        '--cache',
+        help='JSON file caching COUNT(*) results; tables are recounted only when LAST_ALTERED changes'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=DEFAULT_COUNT_WORKERS,
+        help=f'Concurrent COUNT(*) batches for non-Snowflake providers (default: {DEFAULT_COUNT_WORKERS})'
+    )
     
     args = parser.parse_args()
     
@@ -178,7 +484,11 @@ def main():
             sys.exit(1)
         print(f"Auto-detected provider: {provider}")
     
-    enrich_run_results(args.manifest, args.run_results, args.output, provider)
+    enrich_run_results(
+        args.manifest, args.run_results, args.output, provider,
+        exact=args.exact, cache_path=args.cache, sidecar_path=args.sidecar,
+        include_views=args.include_views, max_workers=args.workers
+    )
 
 
 if __name__ == '__main__':
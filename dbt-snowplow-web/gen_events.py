@@ -4,25 +4,232 @@ Script to generate events.csv files with Snowplow event data for yesterday and t
 Can generate based on target GB size instead of row count.
 """
 
-import csv
-import uuid
 import random
-from datetime import datetime, timedelta
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+from itertools import islice
+import io
 import json
 import os
+import queue
 import sys
+import threading
+import zlib
 
-def generate_event_data(target_date, num_events=1000, mobile_percentage=50):
+# Minimum size of each chunk BackgroundWriter hands to its thread. The file itself is opened
+# unbuffered in binary mode, so every chunk is a single write() syscall; larger chunks did not
+# write any faster and only hold more memory in the queue
+WRITE_BUFFER_SIZE = 1 << 20
+
+# Rows are joined by hand instead of going through csv.writer; keep its line terminator
+CSV_LINE_END = '\r\n'
+
+# Rows collected before they are joined into one string and written in a single call
+WRITE_BATCH_ROWS = 4096
+
+# Page views per generate_event_data call; its per-page-view columns are held in memory for one batch
+PAGE_VIEW_BATCH_SIZE = 1000
+
+# Encoded chunks waiting for the writer thread; bounds memory if the disk falls behind
+WRITE_QUEUE_CHUNKS = 4
+
+# Batches submitted to the worker processes ahead of the one being written; bounds the
+# finished CSV text held in memory when generation outpaces the writer
+GENERATE_AHEAD_BATCHES = 8
+
+# Level 1 already shrinks these highly repetitive rows several times over at a fraction of the CPU of level 6
+GZIP_LEVEL = 1
+
+class BackgroundWriter:
+    """File-like sink that encodes text into ~WRITE_BUFFER_SIZE chunks and writes them on a separate thread.
+
+    Generation keeps running while the previous chunk goes to disk. With compress,
+    chunks are gzip-compressed on the writer thread (zlib releases the GIL while it
+    works). Errors raised by the writer thread are re-raised from close().
+    bytes_written counts the (uncompressed) bytes handed to the writer thread so far.
+    """
+
+    def __init__(self, filename, compress=False):
+        self._file = open(filename, 'wb', buffering=0)
+        # wbits=31 emits a gzip header and trailer, so the result is a regular .gz file
+        self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31) if compress else None
+        self._queue = queue.Queue(maxsize=WRITE_QUEUE_CHUNKS)
+        self._parts = []
+        self._pending = 0
+        self.bytes_written = 0
+        self._error = None
+        self._thread = threading.Thread(target=self._drain, daemon=True)
+        self._thread.start()
+
+    def _drain(self):
+        while (chunk := self._queue.get()) is not None:
+            if self._error is not None:
+                continue  # Keep consuming so the producer never blocks on a full queue
+            try:
+                if self._compressor is not None:
+                    chunk = self._compressor.compress(chunk)
+                self._file.write(chunk)
+            except Exception as e:
+                self._error = e
+        if self._compressor is not None and self._error is None:
+            try:
+                self._file.write(self._compressor.flush())
+            except Exception as e:
+                self._error = e
+
+    def write(self, text):
+        self._parts.append(text)
+        self._pending += len(text)
+        if self._pending >= WRITE_BUFFER_SIZE:
+            self._flush()
+
+    def _flush(self):
+        chunk = ''.join(self._parts).encode('utf-8')
+        self.bytes_written += len(chunk)
+        self._queue.put(chunk)
+        self._parts = []
+        self._pending = 0
+
+    def close(self):
+        if self._parts:
+            self._flush()
+        self._queue.put(None)
+        self._thread.join()
+        self._file.close()
+        if self._error is not None:
+            raise self._error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+def csv_field(value):
+    """Quote a value the way csv.writer would (only when it contains a delimiter, quote or newline).
+
+    Used to escape the few fields that need it (user agents, constant values) once, when
+    they are built, so rows can be written with a plain ','.join().
+    """
+    if ',' in value or '"' in value or '\r' in value or '\n' in value:
+        return csv_quote(value)
+    return value
+
+def csv_quote(value):
+    """Quote a value unconditionally; for JSON arrays, which always contain commas and quotes."""
+    return '"' + value.replace('"', '""') + '"'
+
+# Pre-formatted values for the integer browser/device dimensions, so a row picks a
+# ready-made string instead of calling randint() and str() for every cell
+_VIEW_WIDTHS = tuple(str(n) for n in range(800, 1921))
+_VIEW_HEIGHTS = tuple(str(n) for n in range(600, 1081))
+_SCREEN_WIDTHS = tuple(str(n) for n in range(320, 1921))
+_SCREEN_HEIGHTS = tuple(str(n) for n in range(568, 1081))
+
+# Byte translation tables that stamp the UUID version (4) and RFC 4122 variant bits
+_UUID_VERSION = bytes((b & 0x0f) | 0x40 for b in range(256))
+_UUID_VARIANT = bytes((b & 0x3f) | 0x80 for b in range(256))
+
+def uuid4_strings(batch_size=4096, rng=random):
+    """Yield random UUID4 strings, drawing randomness from rng (the random module by default) in large blocks.
+
+    Same format as str(uuid.uuid4()), but one randbytes call (getrandbits
+    underneath) and one hex conversion cover batch_size UUIDs instead of building a
+    UUID object for each. The IDs only need to be unique, not unpredictable, and
+    drawing them from a seeded rng makes the whole output reproducible.
+    """
+    while True:
+        buf = bytearray(rng.randbytes(16 * batch_size))
+        buf[6::16] = buf[6::16].translate(_UUID_VERSION)
+        buf[8::16] = buf[8::16].translate(_UUID_VARIANT)
+        h = buf.hex()
+        for i in range(0, 32 * batch_size, 32):
+            yield f'{h[i:i + 8]}-{h[i + 8:i + 12]}-{h[i + 12:i + 16]}-{h[i + 16:i + 20]}-{h[i + 20:i + 32]}'
+
+# Timestamps are plain ints: microseconds since 0001-01-01, so day = date.toordinal()
+US_PER_SECOND = 1000000
+US_PER_MINUTE = 60 * US_PER_SECOND
+US_PER_DAY = 86400 * US_PER_SECOND
+
+# 'YYYY-MM-DD HH:MM:' per minute since 0001-01-01. A run only touches the minutes of the
+# target date and its neighbours (a few thousand entries), and each one is shared by every
+# timestamp in that minute, including a page view's pings
+_MINUTE_PREFIXES = {}
+
+# 'SS.' and 'mmm' for every second and millisecond value; string concatenation of table
+# entries is much cheaper than evaluating zero-padded format specs for each timestamp
+_SECONDS = tuple(f'{n:02d}.' for n in range(60))
+_MILLISECONDS = tuple(f'{n:03d}' for n in range(1000))
+
+def format_tstamp(us):
+    """Format an integer microsecond timestamp as 'YYYY-MM-DD HH:MM:SS.mmm'."""
+    minute, us = divmod(us, US_PER_MINUTE)
+    prefix = _MINUTE_PREFIXES.get(minute)
+    if prefix is None:
+        day, minute_of_day = divmod(minute, 1440)
+        hour, minute_of_hour = divmod(minute_of_day, 60)
+        prefix = _MINUTE_PREFIXES[minute] = f'{date.fromordinal(day).isoformat()} {hour:02d}:{minute_of_hour:02d}:'
+    second, millisecond = divmod(us // 1000, 1000)
+    return prefix + _SECONDS[second] + _MILLISECONDS[millisecond]
+
+# Stands in for the per-event fields while a visit row is joined, then splits the line around them
+_EVENT_SLOT = '\x00'
+
+def build_visit_segments(template, user_fingerprint, user_id, domain_userid, network_userid, domain_sessionid,
+                         country, city, geo_latitude, geo_longitude, page_url, user_agent, dvce_ismobile,
+                         view_size, screen_size, doc_size, web_page_context, ua_context, yauaa_context,
+                         web_vitals=''):
+    """Return the CSV text of one page view's events around their per-event fields.
+
+    The template is filled in with the fields shared by all events of the page view and
+    joined once; the result is split at the per-event timestamp, id and fingerprint
+    columns, so build_event_line only has to interleave those.
+    """
+    row = list(template)
+    row[USER_ID] = user_id
+    row[USER_FINGERPRINT] = user_fingerprint
+    row[DOMAIN_USERID] = domain_userid
+    row[NETWORK_USERID] = network_userid
+    row[GEO_COUNTRY] = country
+    row[GEO_CITY] = city
+    row[GEO_LATITUDE] = geo_latitude
+    row[GEO_LONGITUDE] = geo_longitude
+    row[PAGE_URL] = page_url
+    row[USERAGENT] = user_agent
+    row[BR_VIEWWIDTH], row[BR_VIEWHEIGHT] = view_size
+    row[DVCE_ISMOBILE] = dvce_ismobile
+    row[DVCE_SCREENWIDTH], row[DVCE_SCREENHEIGHT] = screen_size
+    row[DOC_WIDTH], row[DOC_HEIGHT] = doc_size
+    row[DOMAIN_SESSIONID] = domain_sessionid
+    row[WEB_PAGE_CONTEXT] = web_page_context
+    row[UA_CONTEXT] = ua_context
+    row[YAUAA_CONTEXT] = yauaa_context
+    row[WEB_VITALS] = web_vitals
+    return tuple(','.join(row).split(_EVENT_SLOT))
+
+def build_event_line(visit_segments, etl_tstamp, collector_tstamp, dvce_created_tstamp, event_id, event_fingerprint):
+    """Return one event as a CSV line: visit_segments interleaved with its ids and timestamps."""
+    etl, collector, dvce_created = format_tstamp(etl_tstamp), format_tstamp(collector_tstamp), format_tstamp(dvce_created_tstamp)
+    s0, s1, s2, s3, s4, s5, s6, s7 = visit_segments
+    # Columns in file order: etl, collector, dvce_created, event_id, dvce_sent, derived, event_fingerprint
+    return f'{s0}{etl}{s1}{collector}{s2}{dvce_created}{s3}{event_id}{s4}{dvce_created}{s5}{collector}{s6}{event_fingerprint}{s7}'
+
+def iter_event_data(target_date, num_events=1000, mobile_percentage=50, rng=random):
     """Generate sample Snowplow event data for a specific date.
 
     For each page view, generates:
     - 1 page_view event
     - Multiple page_ping events (for engagement tracking)
 
+    Rows are yielded one at a time as CSV lines (without line terminator), so
+    memory use does not grow with the number of rows.
+
     Args:
         target_date: Date for the events
         num_events: Number of page views to generate
         mobile_percentage: Percentage of events that should be mobile (0-100)
+        rng: random.Random instance to draw from (defaults to the shared random module state)
     """
 
     # Sample data for variety
@@ -53,426 +260,336 @@ def generate_event_data(target_date, num_events=1000, mobile_percentage=50):
         'https://example.com/blog'
     ]
 
-    events = []
-
-    for i in range(num_events):
-        # Generate timestamps for the target date
-        hour = random.randint(0, 23)
-        minute = random.randint(0, 59)
-        second = random.randint(0, 59)
-
-        base_time = datetime.combine(target_date, datetime.min.time().replace(hour=hour, minute=minute, second=second))
-        # Add milliseconds for compatibility with dbt models
-        base_time = base_time.replace(microsecond=random.randint(0, 999999))
-
+    # Everything derived from the user agent only depends on the agent string, so the
+    # substring checks run once per agent and the resulting fields (CSV-escaped) are looked up per row:
+    # (user agent, dvce_ismobile, UA parser context, YAUAA context)
+    ua_fields = {}
+    for user_agent in desktop_user_agents + mobile_user_agents:
+        is_mobile = 'Mobile' in user_agent
+        is_iphone = 'iPhone' in user_agent
+        ua_fields[user_agent] = (
+            csv_field(user_agent),
+            'TRUE' if is_mobile else 'FALSE',
+            csv_quote(json.dumps([{
+                'deviceFamily': 'iPhone' if is_iphone else 'Desktop',
+                'osFamily': 'iOS' if is_iphone else 'Windows',
+                'useragentFamily': 'Safari' if 'Safari' in user_agent else 'Chrome'
+            }])),
+            csv_quote(json.dumps([{'agentClass': 'Browser', 'deviceClass': 'Phone' if is_mobile else 'Desktop'}])),
+        )
+
+    next_uuid = uuid4_strings(rng=rng).__next__
+
+    # Draw the per-page-view random values column by column: one choices call
+    # per field for the whole batch instead of a randint call per field per page view
+    choices = rng.choices
+    # Collector time is uniform over the target day, to the microsecond
+    day_start = target_date.toordinal() * US_PER_DAY
+    base_times = [day_start + us for us in choices(range(US_PER_DAY), k=num_events)]
+    # Snowplow sends page_ping every 10 seconds by default (heartbeat)
+    # Generate 0-12 pings (0-120 seconds of engagement)
+    ping_counts = choices(range(13), k=num_events)
+    page_view_countries = choices(countries, k=num_events)
+    page_view_cities = choices(cities, k=num_events)
+    page_view_urls = choices(pages, k=num_events)
+    # Select user agent based on mobile_percentage: one weighted draw over all agents, where the
+    # mobile agents share mobile_percentage of the weight and the desktop agents the rest
+    mobile_share = min(max(mobile_percentage, 0), 100)
+    page_view_user_agents = choices(
+        mobile_user_agents + desktop_user_agents,
+        weights=[mobile_share / len(mobile_user_agents)] * len(mobile_user_agents)
+        + [(100 - mobile_share) / len(desktop_user_agents)] * len(desktop_user_agents),
+        k=num_events,
+    )
+    # Location and device sizes belong to the visit, so all of its events share them
+    rand = rng.random
+    geo_latitudes = [str(-90 + 180 * rand()) for _ in range(num_events)]
+    geo_longitudes = [str(-180 + 360 * rand()) for _ in range(num_events)]
+    view_sizes = list(zip(choices(_VIEW_WIDTHS, k=num_events), choices(_VIEW_HEIGHTS, k=num_events)))
+    screen_sizes = list(zip(choices(_SCREEN_WIDTHS, k=num_events), choices(_SCREEN_HEIGHTS, k=num_events)))
+    doc_sizes = list(zip(choices(_VIEW_WIDTHS, k=num_events), choices(_VIEW_HEIGHTS, k=num_events)))
+    # Device clock runs 1-5s behind the collector, enrichment 1-3s after it
+    dvce_offsets = choices(range(1 * US_PER_SECOND, 6 * US_PER_SECOND), k=num_events)
+    etl_offsets = choices(range(1 * US_PER_SECOND, 4 * US_PER_SECOND), k=num_events)
+    # Web vitals JSON, CSV-escaped, formatted directly: the same text as
+    # csv_quote(json.dumps([{'cls': ..., 'fcp': ..., ..., 'navigation_type': 'navigate', 'ttfb': ...}]))
+    web_vitals_fields = [
+        f'"[{{""cls"": {round(0.01 + 0.09 * rand(), 3)!r}, ""fcp"": {fcp}, ""fid"": {fid}, ""inp"": {inp}, '
+        f'""lcp"": {lcp}, ""navigation_type"": ""navigate"", ""ttfb"": {ttfb}}}]"'
+        for fcp, fid, inp, lcp, ttfb in zip(
+            choices(range(100, 501), k=num_events),
+            choices(range(10, 101), k=num_events),
+            choices(range(10, 101), k=num_events),
+            choices(range(1000, 3001), k=num_events),
+            choices(range(50, 301), k=num_events))
+    ]
+    # Ping clock offsets are drawn for every ping in the batch at once and consumed in order
+    total_pings = sum(ping_counts)
+    next_ping_dvce_offset = iter(choices(range(1 * US_PER_SECOND, 4 * US_PER_SECOND, US_PER_SECOND), k=total_pings)).__next__
+    next_ping_etl_offset = iter(choices(range(1 * US_PER_SECOND, 3 * US_PER_SECOND, US_PER_SECOND), k=total_pings)).__next__
+
+    # Local aliases for names used on every row (LOAD_FAST instead of global/attribute lookups)
+    build_visit = build_visit_segments
+    build_line = build_event_line
+    page_view_template = _PAGE_VIEW_TEMPLATE
+    page_ping_template = _PAGE_PING_TEMPLATE
+    ping_interval = 10 * US_PER_SECOND
+
+    for (base_time, num_pings, country, city, page_url, user_agent,
+         geo_latitude, geo_longitude, view_size, screen_size, doc_size,
+         dvce_offset, etl_offset, web_vitals_field) in zip(
+            base_times, ping_counts,
+            page_view_countries, page_view_cities, page_view_urls, page_view_user_agents,
+            geo_latitudes, geo_longitudes, view_sizes, screen_sizes, doc_sizes,
+            dvce_offsets, etl_offsets, web_vitals_fields):
         # Generate event data
-        user_id = str(uuid.uuid4())
-        domain_userid = str(uuid.uuid4())
-        domain_sessionid = str(uuid.uuid4())
-        network_userid = str(uuid.uuid4())
-        page_view_id = str(uuid.uuid4())  # Unique ID for this page view
-
-        country = random.choice(countries)
-        city = random.choice(cities)
-
-        # Select user agent based on mobile_percentage
-        is_mobile = random.randint(1, 100) <= mobile_percentage
-        user_agent = random.choice(mobile_user_agents if is_mobile else desktop_user_agents)
-
-        page_url = random.choice(pages)
+        user_id = next_uuid()
+        domain_userid = next_uuid()
+        domain_sessionid = next_uuid()
+        network_userid = next_uuid()
+        page_view_id = next_uuid()  # Unique ID for this page view
+        user_fingerprint = next_uuid()
 
         # Generate page_view event first
         collector_tstamp = base_time
-        dvce_created_tstamp = base_time - timedelta(seconds=random.randint(1, 5), microseconds=random.randint(0, 999999))
-        etl_tstamp = base_time + timedelta(seconds=random.randint(1, 3), microseconds=random.randint(0, 999999))
-        event_id = str(uuid.uuid4())
+        dvce_created_tstamp = base_time - dvce_offset
+        etl_tstamp = base_time + etl_offset
+        event_id = next_uuid()
         
         # Generate contexts (simplified JSON)
-        ua_context = [{
-            'deviceFamily': 'iPhone' if 'iPhone' in user_agent else 'Desktop',
-            'osFamily': 'iOS' if 'iPhone' in user_agent else 'Windows',
-            'useragentFamily': 'Safari' if 'Safari' in user_agent else 'Chrome'
-        }]
+        user_agent_csv, dvce_ismobile, ua_context, yauaa_context = ua_fields[user_agent]
 
         # Use the same page_view_id for all events related to this page view
-        web_page_context = [{'id': page_view_id}]
-        iab_context = [{'category': 'BROWSER', 'spiderOrRobot': False}]
-        yauaa_context = [{'agentClass': 'Browser', 'deviceClass': 'Phone' if 'Mobile' in user_agent else 'Desktop'}]
-        
-        # Generate web vitals
-        web_vitals = [{
-            'cls': round(random.uniform(0.01, 0.1), 3),
-            'fcp': random.randint(100, 500),
-            'fid': random.randint(10, 100),
-            'inp': random.randint(10, 100),
-            'lcp': random.randint(1000, 3000),
-            'navigation_type': 'navigate',
-            'ttfb': random.randint(50, 300)
-        }]
-
-        # Create page_view event
-        page_view_event = [
-            'default',  # app_id
-            'web',      # platform
-            etl_tstamp.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3],  # etl_tstamp with milliseconds
-            collector_tstamp.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3],  # collector_tstamp with milliseconds
-            dvce_created_tstamp.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3],  # dvce_created_tstamp with milliseconds
-            'page_view',  # event
-            event_id,  # event_id
-            '',  # txn_id
-            'eng.gcp-dev1',  # name_tracker
-            'js-2.17.2',  # v_tracker
-            'ssc-2.1.2-googlepubsub',  # v_collector
-            'beam-enrich-1.4.2-rc1-common-1.4.2-rc1',  # v_etl
-            user_id,  # user_id
-            '',  # user_ipaddress
-            str(uuid.uuid4()),  # user_fingerprint
-            domain_userid,  # domain_userid
-            '1',  # domain_sessionidx
-            network_userid,  # network_userid
-            country,  # geo_country
-            '',  # geo_region
-            city,  # geo_city
-            '',  # geo_zipcode
-            str(random.uniform(-90, 90)),  # geo_latitude
-            str(random.uniform(-180, 180)),  # geo_longitude
-            '',  # geo_region_name
-            '',  # ip_isp
-            '',  # ip_organization
-            '',  # ip_domain
-            '',  # ip_netspeed
-            page_url,  # page_url
-            'Sample Page',  # page_title
-            'https://www.google.com/',  # page_referrer
-            'https',  # page_urlscheme
-            'example.com',  # page_urlhost
-            '443',  # page_urlport
-            '/',  # page_urlpath
-            '',  # page_urlquery
-            '',  # page_urlfragment
-            'https',  # refr_urlscheme
-            'www.google.com',  # refr_urlhost
-            '443',  # refr_urlport
-            '/',  # refr_urlpath
-            '',  # refr_urlquery
-            '',  # refr_urllfragment
-            'search',  # refr_medium
-            'Google',  # refr_source
-            '',  # refr_term
-            '',  # mkt_medium
-            '',  # mkt_source
-            '',  # mkt_term
-            '',  # mkt_content
-            '',  # mkt_campaign
-            '',  # se_category
-            '',  # se_action
-            '',  # se_label
-            '',  # se_property
-            '',  # se_value
-            '',  # tr_orderid
-            '',  # tr_affiliation
-            '',  # tr_total
-            '',  # tr_tax
-            '',  # tr_shipping
-            '',  # tr_city
-            '',  # tr_state
-            '',  # tr_country
-            '',  # ti_orderid
-            '',  # ti_sku
-            '',  # ti_name
-            '',  # ti_category
-            '',  # ti_price
-            '',  # ti_quantity
-            '',  # pp_xoffset_min
-            '',  # pp_xoffset_max
-            '',  # pp_yoffset_min
-            '',  # pp_yoffset_max
-            user_agent,  # useragent
-            '',  # br_name
-            '',  # br_family
-            '',  # br_version
-            '',  # br_type
-            '',  # br_renderengine
-            'en-US',  # br_lang
-            '',  # br_features_pdf
-            '',  # br_features_flash
-            '',  # br_features_java
-            '',  # br_features_director
-            '',  # br_features_quicktime
-            '',  # br_features_realplayer
-            '',  # br_features_windowsmedia
-            '',  # br_features_gears
-            '',  # br_features_silverlight
-            'TRUE',  # br_cookies
-            '24',  # br_colordepth
-            str(random.randint(800, 1920)),  # br_viewwidth
-            str(random.randint(600, 1080)),  # br_viewheight
-            '',  # os_name
-            '',  # os_family
-            '',  # os_manufacturer
-            'America/New_York',  # os_timezone
-            '',  # dvce_type
-            'TRUE' if 'Mobile' in user_agent else 'FALSE',  # dvce_ismobile
-            str(random.randint(320, 1920)),  # dvce_screenwidth
-            str(random.randint(568, 1080)),  # dvce_screenheight
-            'UTF-8',  # doc_charset
-            str(random.randint(800, 1920)),  # doc_width
-            str(random.randint(600, 1080)),  # doc_height
-            '',  # tr_currency
-            '',  # tr_total_base
-            '',  # tr_tax_base
-            '',  # tr_shipping_base
-            '',  # ti_currency
-            '',  # ti_price_base
-            '',  # base_currency
-            'America/New_York',  # geo_timezone
-            '',  # mkt_clickid
-            '',  # mkt_network
-            '',  # etl_tags
-            dvce_created_tstamp.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3],  # dvce_sent_tstamp with milliseconds
-            '',  # refr_domain_userid
-            '',  # refr_dvce_tstamp
-            domain_sessionid,  # domain_sessionid
-            collector_tstamp.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3],  # derived_tstamp with milliseconds
-            'com.snowplowanalytics.snowplow',  # event_vendor
-            'page_view',  # event_name - always page_view for this event
-            'jsonschema',  # event_format
-            '1-0-0',  # event_version
-            str(uuid.uuid4()),  # event_fingerprint
-            '',  # true_tstamp
-            '',  # load_tstamp
-            json.dumps(web_page_context),  # contexts_com_snowplowanalytics_snowplow_web_page_1
-            '',  # unstruct_event_com_snowplowanalytics_snowplow_consent_preferences_1
-            '',  # unstruct_event_com_snowplowanalytics_snowplow_cmp_visible_1
-            json.dumps(iab_context),  # contexts_com_iab_snowplow_spiders_and_robots_1
-            json.dumps(ua_context),  # contexts_com_snowplowanalytics_snowplow_ua_parser_context_1
-            json.dumps(yauaa_context),  # contexts_nl_basjes_yauaa_context_1
-            json.dumps(web_vitals)  # unstruct_event_com_snowplowanalytics_snowplow_web_vitals_1
-        ]
-
-        events.append(page_view_event)
-
-        # Generate page_ping events for engagement tracking
-        # Snowplow sends page_ping every 10 seconds by default (heartbeat)
-        # Generate 0-12 pings (0-120 seconds of engagement)
-        num_pings = random.randint(0, 12)
-
+        # (csv_quote(json.dumps([{'id': page_view_id}])), built directly)
+        web_page_context = f'"[{{""id"": ""{page_view_id}""}}]"'
+
+        # Create page_view event from the template; only the varying fields are set here
+        yield build_line(
+            build_visit(
+                page_view_template, user_fingerprint, user_id, domain_userid, network_userid, domain_sessionid,
+                country, city, geo_latitude, geo_longitude, page_url, user_agent_csv, dvce_ismobile,
+                view_size, screen_size, doc_size, web_page_context, ua_context, yauaa_context, web_vitals_field
+            ),
+            etl_tstamp, collector_tstamp, dvce_created_tstamp, event_id, next_uuid()
+        )
+
+        # Generate page_ping events for engagement tracking. Pings share the user, session,
+        # device, page and contexts of the page_view (SAME page_view_id!), so those fields are
+        # joined once per page view and each ping only adds its own ids and timestamps;
+        # no web vitals for pings
+        if num_pings:
+            ping_visit_segments = build_visit(
+                page_ping_template, user_fingerprint, user_id, domain_userid, network_userid, domain_sessionid,
+                country, city, geo_latitude, geo_longitude, page_url, user_agent_csv, dvce_ismobile,
+                view_size, screen_size, doc_size, web_page_context, ua_context, yauaa_context
+            )
         for ping_num in range(num_pings):
             # Each ping is 10 seconds apart
-            ping_time = base_time + timedelta(seconds=10 * (ping_num + 1))
+            ping_time = base_time + ping_interval * (ping_num + 1)
             ping_collector_tstamp = ping_time
-            ping_dvce_created_tstamp = ping_time - timedelta(seconds=random.randint(1, 3))
-            ping_etl_tstamp = ping_time + timedelta(seconds=random.randint(1, 2))
-            ping_event_id = str(uuid.uuid4())
-
-            page_ping_event = [
-                'default',  # app_id
-                'web',      # platform
-                ping_etl_tstamp.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3],  # etl_tstamp
-                ping_collector_tstamp.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3],  # collector_tstamp
-                ping_dvce_created_tstamp.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3],  # dvce_created_tstamp
-                'page_ping',  # event - THIS IS THE KEY DIFFERENCE
-                ping_event_id,  # event_id
-                '',  # txn_id
-                'eng.gcp-dev1',  # name_tracker
-                'js-2.17.2',  # v_tracker
-                'ssc-2.1.2-googlepubsub',  # v_collector
-                'beam-enrich-1.4.2-rc1-common-1.4.2-rc1',  # v_etl
-                user_id,  # user_id (same as page_view)
-                '',  # user_ipaddress
-                str(uuid.uuid4()),  # user_fingerprint
-                domain_userid,  # domain_userid (same as page_view)
-                '1',  # domain_sessionidx
-                network_userid,  # network_userid (same as page_view)
-                country,  # geo_country
-                '',  # geo_region
-                city,  # geo_city
-                '',  # geo_zipcode
-                str(random.uniform(-90, 90)),  # geo_latitude
-                str(random.uniform(-180, 180)),  # geo_longitude
-                '',  # geo_region_name
-                '',  # ip_isp
-                '',  # ip_organization
-                '',  # ip_domain
-                '',  # ip_netspeed
-                page_url,  # page_url (same as page_view)
-                'Sample Page',  # page_title
-                'https://www.google.com/',  # page_referrer
-                'https',  # page_urlscheme
-                'example.com',  # page_urlhost
-                '443',  # page_urlport
-                '/',  # page_urlpath
-                '',  # page_urlquery
-                '',  # page_urlfragment
-                'https',  # refr_urlscheme
-                'www.google.com',  # refr_urlhost
-                '443',  # refr_urlport
-                '/',  # refr_urlpath
-                '',  # refr_urlquery
-                '',  # refr_urllfragment
-                'search',  # refr_medium
-                'Google',  # refr_source
-                '',  # refr_term
-                '',  # mkt_medium
-                '',  # mkt_source
-                '',  # mkt_term
-                '',  # mkt_content
-                '',  # mkt_campaign
-                '',  # se_category
-                '',  # se_action
-                '',  # se_label
-                '',  # se_property
-                '',  # se_value
-                '',  # tr_orderid
-                '',  # tr_affiliation
-                '',  # tr_total
-                '',  # tr_tax
-                '',  # tr_shipping
-                '',  # tr_city
-                '',  # tr_state
-                '',  # tr_country
-                '',  # ti_orderid
-                '',  # ti_sku
-                '',  # ti_name
-                '',  # ti_category
-                '',  # ti_price
-                '',  # ti_quantity
-                '',  # pp_xoffset_min
-                '',  # pp_xoffset_max
-                '',  # pp_yoffset_min
-                '',  # pp_yoffset_max
-                user_agent,  # useragent
-                '',  # br_name
-                '',  # br_family
-                '',  # br_version
-                '',  # br_type
-                '',  # br_renderengine
-                'en-US',  # br_lang
-                '',  # br_features_pdf
-                '',  # br_features_flash
-                '',  # br_features_java
-                '',  # br_features_director
-                '',  # br_features_quicktime
-                '',  # br_features_realplayer
-                '',  # br_features_windowsmedia
-                '',  # br_features_gears
-                '',  # br_features_silverlight
-                'TRUE',  # br_cookies
-                '24',  # br_colordepth
-                str(random.randint(800, 1920)),  # br_viewwidth
-                str(random.randint(600, 1080)),  # br_viewheight
-                '',  # os_name
-                '',  # os_family
-                '',  # os_manufacturer
-                'America/New_York',  # os_timezone
-                '',  # dvce_type
-                'TRUE' if 'Mobile' in user_agent else 'FALSE',  # dvce_ismobile
-                str(random.randint(320, 1920)),  # dvce_screenwidth
-                str(random.randint(568, 1080)),  # dvce_screenheight
-                'UTF-8',  # doc_charset
-                str(random.randint(800, 1920)),  # doc_width
-                str(random.randint(600, 1080)),  # doc_height
-                '',  # tr_currency
-                '',  # tr_total_base
-                '',  # tr_tax_base
-                '',  # tr_shipping_base
-                '',  # ti_currency
-                '',  # ti_price_base
-                '',  # base_currency
-                'America/New_York',  # geo_timezone
-                '',  # mkt_clickid
-                '',  # mkt_network
-                '',  # etl_tags
-                ping_dvce_created_tstamp.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3],  # dvce_sent_tstamp
-                '',  # refr_domain_userid
-                '',  # refr_dvce_tstamp
-                domain_sessionid,  # domain_sessionid (same as page_view)
-                ping_collector_tstamp.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3],  # derived_tstamp
-                'com.snowplowanalytics.snowplow',  # event_vendor
-                'page_ping',  # event_name - page_ping for engagement
-                'jsonschema',  # event_format
-                '1-0-0',  # event_version
-                str(uuid.uuid4()),  # event_fingerprint
-                '',  # true_tstamp
-                '',  # load_tstamp
-                json.dumps(web_page_context),  # contexts_com_snowplowanalytics_snowplow_web_page_1 (SAME page_view_id!)
-                '',  # unstruct_event_com_snowplowanalytics_snowplow_consent_preferences_1
-                '',  # unstruct_event_com_snowplowanalytics_snowplow_cmp_visible_1
-                json.dumps(iab_context),  # contexts_com_iab_snowplow_spiders_and_robots_1
-                json.dumps(ua_context),  # contexts_com_snowplowanalytics_snowplow_ua_parser_context_1
-                json.dumps(yauaa_context),  # contexts_nl_basjes_yauaa_context_1
-                ''  # unstruct_event_com_snowplowanalytics_snowplow_web_vitals_1 (no web vitals for pings)
-            ]
-
-            events.append(page_ping_event)
-    
-    return events
+            ping_dvce_created_tstamp = ping_time - next_ping_dvce_offset()
+            ping_etl_tstamp = ping_time + next_ping_etl_offset()
+            ping_event_id = next_uuid()
+
+            yield build_line(
+                ping_visit_segments, ping_etl_tstamp, ping_collector_tstamp, ping_dvce_created_tstamp,
+                ping_event_id, next_uuid()
+            )
+
+def generate_event_data(out, target_date, num_events=1000, mobile_percentage=50, rng=random):
+    """Write the rows of iter_event_data to out, joining WRITE_BATCH_ROWS lines per write call.
+
+    Args:
+        out: Text file to write the event rows to
+        target_date: Date for the events
+        num_events: Number of page views to generate
+        mobile_percentage: Percentage of events that should be mobile (0-100)
+        rng: random.Random instance to draw from (defaults to the shared random module state)
+
+    Returns:
+        Number of rows written
+    """
+    rows_written = 0
+    rows = iter_event_data(target_date, num_events=num_events, mobile_percentage=mobile_percentage, rng=rng)
+    while batch := list(islice(rows, WRITE_BATCH_ROWS)):
+        out.write(CSV_LINE_END.join(batch) + CSV_LINE_END)
+        rows_written += len(batch)
+    return rows_written
+
+# Column names of the events file, in order
+CSV_HEADERS = (
+    'app_id', 'platform', 'etl_tstamp', 'collector_tstamp', 'dvce_created_tstamp', 'event', 'event_id', 'txn_id', 'name_tracker', 'v_tracker',
+    'v_collector', 'v_etl', 'user_id', 'user_ipaddress', 'user_fingerprint', 'domain_userid', 'domain_sessionidx', 'network_userid', 'geo_country', 'geo_region',
+    'geo_city', 'geo_zipcode', 'geo_latitude', 'geo_longitude', 'geo_region_name', 'ip_isp', 'ip_organization', 'ip_domain', 'ip_netspeed', 'page_url',
+    'page_title', 'page_referrer', 'page_urlscheme', 'page_urlhost', 'page_urlport', 'page_urlpath', 'page_urlquery', 'page_urlfragment', 'refr_urlscheme', 'refr_urlhost',
+    'refr_urlport', 'refr_urlpath', 'refr_urlquery', 'refr_urlfragment', 'refr_medium', 'refr_source', 'refr_term', 'mkt_medium', 'mkt_source', 'mkt_term',
+    'mkt_content', 'mkt_campaign', 'se_category', 'se_action', 'se_label', 'se_property', 'se_value', 'tr_orderid', 'tr_affiliation', 'tr_total', 'tr_tax',
+    'tr_shipping', 'tr_city', 'tr_state', 'tr_country', 'ti_orderid', 'ti_sku', 'ti_name', 'ti_category', 'ti_price', 'ti_quantity', 'pp_xoffset_min', 'pp_xoffset_max',
+    'pp_yoffset_min', 'pp_yoffset_max', 'useragent', 'br_name', 'br_family', 'br_version', 'br_type', 'br_renderengine', 'br_lang', 'br_features_pdf', 'br_features_flash',
+    'br_features_java', 'br_features_director', 'br_features_quicktime', 'br_features_realplayer', 'br_features_windowsmedia', 'br_features_gears', 'br_features_silverlight',
+    'br_cookies', 'br_colordepth', 'br_viewwidth', 'br_viewheight', 'os_name', 'os_family', 'os_manufacturer', 'os_timezone', 'dvce_type', 'dvce_ismobile', 'dvce_screenwidth',
+    'dvce_screenheight', 'doc_charset', 'doc_width', 'doc_height', 'tr_currency', 'tr_total_base', 'tr_tax_base', 'tr_shipping_base', 'ti_currency', 'ti_price_base',
+    'base_currency', 'geo_timezone', 'mkt_clickid', 'mkt_network', 'etl_tags', 'dvce_sent_tstamp', 'refr_domain_userid', 'refr_dvce_tstamp', 'domain_sessionid', 'derived_tstamp',
+    'event_vendor', 'event_name', 'event_format', 'event_version', 'event_fingerprint', 'true_tstamp', 'load_tstamp', 'contexts_com_snowplowanalytics_snowplow_web_page_1',
+    'unstruct_event_com_snowplowanalytics_snowplow_consent_preferences_1', 'unstruct_event_com_snowplowanalytics_snowplow_cmp_visible_1',
+    'contexts_com_iab_snowplow_spiders_and_robots_1', 'contexts_com_snowplowanalytics_snowplow_ua_parser_context_1', 'contexts_nl_basjes_yauaa_context_1',
+    'unstruct_event_com_snowplowanalytics_snowplow_web_vitals_1'
+)
+
+# Header row as written at the top of every events file
+CSV_HEADER_LINE = ','.join(CSV_HEADERS) + CSV_LINE_END
 
 def get_csv_headers():
     """Return CSV headers for the events file."""
-    return [
-        'app_id', 'platform', 'etl_tstamp', 'collector_tstamp', 'dvce_created_tstamp', 'event', 'event_id', 'txn_id', 'name_tracker', 'v_tracker',
-        'v_collector', 'v_etl', 'user_id', 'user_ipaddress', 'user_fingerprint', 'domain_userid', 'domain_sessionidx', 'network_userid', 'geo_country', 'geo_region',
-        'geo_city', 'geo_zipcode', 'geo_latitude', 'geo_longitude', 'geo_region_name', 'ip_isp', 'ip_organization', 'ip_domain', 'ip_netspeed', 'page_url',
-        'page_title', 'page_referrer', 'page_urlscheme', 'page_urlhost', 'page_urlport', 'page_urlpath', 'page_urlquery', 'page_urlfragment', 'refr_urlscheme', 'refr_urlhost',
-        'refr_urlport', 'refr_urlpath', 'refr_urlquery', 'refr_urlfragment', 'refr_medium', 'refr_source', 'refr_term', 'mkt_medium', 'mkt_source', 'mkt_term',
-        'mkt_content', 'mkt_campaign', 'se_category', 'se_action', 'se_label', 'se_property', 'se_value', 'tr_orderid', 'tr_affiliation', 'tr_total', 'tr_tax',
-        'tr_shipping', 'tr_city', 'tr_state', 'tr_country', 'ti_orderid', 'ti_sku', 'ti_name', 'ti_category', 'ti_price', 'ti_quantity', 'pp_xoffset_min', 'pp_xoffset_max',
-        'pp_yoffset_min', 'pp_yoffset_max', 'useragent', 'br_name', 'br_family', 'br_version', 'br_type', 'br_renderengine', 'br_lang', 'br_features_pdf', 'br_features_flash',
-        'br_features_java', 'br_features_director', 'br_features_quicktime', 'br_features_realplayer', 'br_features_windowsmedia', 'br_features_gears', 'br_features_silverlight',
-        'br_cookies', 'br_colordepth', 'br_viewwidth', 'br_viewheight', 'os_name', 'os_family', 'os_manufacturer', 'os_timezone', 'dvce_type', 'dvce_ismobile', 'dvce_screenwidth',
-        'dvce_screenheight', 'doc_charset', 'doc_width', 'doc_height', 'tr_currency', 'tr_total_base', 'tr_tax_base', 'tr_shipping_base', 'ti_currency', 'ti_price_base',
-        'base_currency', 'geo_timezone', 'mkt_clickid', 'mkt_network', 'etl_tags', 'dvce_sent_tstamp', 'refr_domain_userid', 'refr_dvce_tstamp', 'domain_sessionid', 'derived_tstamp',
-        'event_vendor', 'event_name', 'event_format', 'event_version', 'event_fingerprint', 'true_tstamp', 'load_tstamp', 'contexts_com_snowplowanalytics_snowplow_web_page_1',
-        'unstruct_event_com_snowplowanalytics_snowplow_consent_preferences_1', 'unstruct_event_com_snowplowanalytics_snowplow_cmp_visible_1',
-        'contexts_com_iab_snowplow_spiders_and_robots_1', 'contexts_com_snowplowanalytics_snowplow_ua_parser_context_1', 'contexts_nl_basjes_yauaa_context_1',
-        'unstruct_event_com_snowplowanalytics_snowplow_web_vitals_1'
-    ]
+    return CSV_HEADERS
+
+# Column positions of the fields that vary per event
+(ETL_TSTAMP, COLLECTOR_TSTAMP, DVCE_CREATED_TSTAMP, EVENT_ID, USER_ID, USER_FINGERPRINT, DOMAIN_USERID,
+ NETWORK_USERID, GEO_COUNTRY, GEO_CITY, GEO_LATITUDE, GEO_LONGITUDE, PAGE_URL, USERAGENT, BR_VIEWWIDTH,
+ BR_VIEWHEIGHT, DVCE_ISMOBILE, DVCE_SCREENWIDTH, DVCE_SCREENHEIGHT, DOC_WIDTH, DOC_HEIGHT, DVCE_SENT_TSTAMP,
+ DOMAIN_SESSIONID, DERIVED_TSTAMP, EVENT_FINGERPRINT, WEB_PAGE_CONTEXT, UA_CONTEXT, YAUAA_CONTEXT,
+ WEB_VITALS) = (CSV_HEADERS.index(name) for name in (
+    'etl_tstamp', 'collector_tstamp', 'dvce_created_tstamp', 'event_id', 'user_id', 'user_fingerprint', 'domain_userid',
+    'network_userid', 'geo_country', 'geo_city', 'geo_latitude', 'geo_longitude', 'page_url', 'useragent', 'br_viewwidth',
+    'br_viewheight', 'dvce_ismobile', 'dvce_screenwidth', 'dvce_screenheight', 'doc_width', 'doc_height', 'dvce_sent_tstamp',
+    'domain_sessionid', 'derived_tstamp', 'event_fingerprint', 'contexts_com_snowplowanalytics_snowplow_web_page_1',
+    'contexts_com_snowplowanalytics_snowplow_ua_parser_context_1', 'contexts_nl_basjes_yauaa_context_1', 'unstruct_event_com_snowplowanalytics_snowplow_web_vitals_1'))
+
+# Columns set per event rather than per page view, in file order (see build_event_line)
+_EVENT_COLUMNS = (ETL_TSTAMP, COLLECTOR_TSTAMP, DVCE_CREATED_TSTAMP, EVENT_ID, DVCE_SENT_TSTAMP, DERIVED_TSTAMP,
+                  EVENT_FINGERPRINT)
+
+# Fields with the same value in every generated event; all other fields default to ''
+CONSTANT_FIELDS = {
+    'app_id': 'default',
+    'platform': 'web',
+    'name_tracker': 'eng.gcp-dev1',
+    'v_tracker': 'js-2.17.2',
+    'v_collector': 'ssc-2.1.2-googlepubsub',
+    'v_etl': 'beam-enrich-1.4.2-rc1-common-1.4.2-rc1',
+    'domain_sessionidx': '1',
+    'page_title': 'Sample Page',
+    'page_referrer': 'https://www.google.com/',
+    'page_urlscheme': 'https',
+    'page_urlhost': 'example.com',
+    'page_urlport': '443',
+    'page_urlpath': '/',
+    'refr_urlscheme': 'https',
+    'refr_urlhost': 'www.google.com',
+    'refr_urlport': '443',
+    'refr_urlpath': '/',
+    'refr_medium': 'search',
+    'refr_source': 'Google',
+    'br_lang': 'en-US',
+    'br_cookies': 'TRUE',
+    'br_colordepth': '24',
+    'os_timezone': 'America/New_York',
+    'doc_charset': 'UTF-8',
+    'geo_timezone': 'America/New_York',
+    'event_vendor': 'com.snowplowanalytics.snowplow',
+    'event_format': 'jsonschema',
+    'event_version': '1-0-0',
+    'contexts_com_iab_snowplow_spiders_and_robots_1': json.dumps([{'category': 'BROWSER', 'spiderOrRobot': False}]),
+}
+
+def build_event_template(event):
+    """Return a row tuple for an event type with every constant field filled in (CSV-escaped).
+
+    Constant values are interned, so every template (and every row copied from
+    one) refers to a single string object per value. The per-event columns hold
+    _EVENT_SLOT, ready for build_visit_segments to split the joined row on.
+    """
+    row = [''] * len(CSV_HEADERS)
+    for name, value in CONSTANT_FIELDS.items():
+        row[CSV_HEADERS.index(name)] = sys.intern(csv_field(value))
+    row[CSV_HEADERS.index('event')] = event
+    row[CSV_HEADERS.index('event_name')] = event
+    for column in _EVENT_COLUMNS:
+        row[column] = _EVENT_SLOT
+    return tuple(row)
+
+# Copied per page view so the ~100 constant and empty fields aren't rebuilt for every row
+_PAGE_VIEW_TEMPLATE = build_event_template('page_view')
+_PAGE_PING_TEMPLATE = build_event_template('page_ping')
+
+def _generate_batch(batch):
+    """Pool worker: generate one batch of page views from its own seeded random.Random.
 
-def write_events_csv(filename, events):
-    """Write events to CSV file."""
-    headers = get_csv_headers()
-    
-    with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-        writer = csv.writer(csvfile)
-        writer.writerow(headers)
-        writer.writerows(events)
+    Returns:
+        (CSV text, rows generated, page views generated)
+    """
+    target_date, num_events, mobile_percentage, seed = batch
+    out = io.StringIO()
+    rows = generate_event_data(out, target_date, num_events=num_events, mobile_percentage=mobile_percentage,
+                               rng=random.Random(seed))
+    return out.getvalue(), rows, num_events
+
+def iter_event_batches(target_date, num_events, mobile_percentage=50):
+    """Generate num_events page views in batches of PAGE_VIEW_BATCH_SIZE, one worker process per CPU.
+
+    Batches are yielded in order as (CSV text, rows, page views). Each one is seeded from
+    the random module, so seeding it still makes the output reproducible. At most
+    GENERATE_AHEAD_BATCHES batches (or one per worker, if more) are in flight at a time.
+    """
+    seed = random.getrandbits(64)
+    batches = [(target_date, min(PAGE_VIEW_BATCH_SIZE, num_events - start), mobile_percentage, seed + start)
+               for start in range(0, num_events, PAGE_VIEW_BATCH_SIZE)]
+    workers = min(os.cpu_count() or 1, len(batches))
+    if workers <= 1:
+        yield from map(_generate_batch, batches)
+        return
+    ahead = max(GENERATE_AHEAD_BATCHES, workers)
+    with ProcessPoolExecutor(workers) as executor:
+        pending = deque()
+        for batch in batches:
+            if len(pending) >= ahead:
+                yield pending.popleft().result()
+            pending.append(executor.submit(_generate_batch, batch))
+        while pending:
+            yield pending.popleft().result()
+
+def write_events_csv(filename, target_date, num_events, mobile_percentage=50, compress=False):
+    """Generate events for num_events page views straight into a CSV file (gzip-compressed with compress)."""
+    total_events = 0
+    with BackgroundWriter(filename, compress=compress) as csvfile:
+        csvfile.write(CSV_HEADER_LINE)
+        for batch_text, batch_rows, _ in iter_event_batches(target_date, num_events, mobile_percentage):
+            csvfile.write(batch_text)
+            total_events += batch_rows
     
     file_size = os.path.getsize(filename) / (1024 * 1024)  # Size in MB
-    print(f"Generated {len(events)} events in {filename} ({file_size:.2f} MB)")
+    print(f"Generated {total_events:,} events in {filename} ({file_size:.2f} MB)")
+    
+    return total_events
 
-def generate_events_by_size(filename, target_date, target_size_gb, mobile_percentage=50):
+def generate_events_by_size(filename, target_date, target_size_gb, mobile_percentage=50, compress=False):
     """
     Generate events to reach a target file size in GB.
 
     Args:
         filename: Output CSV filename
         target_date: Date for the events
-        target_size_gb: Target file size in GB
+        target_size_gb: Target file size in GB (uncompressed CSV size when compress is set)
         mobile_percentage: Percentage of events that should be mobile (0-100)
+        compress: Write the file gzip-compressed
 
     Returns:
-        List of generated events
+        Number of generated events
     """
     target_size_bytes = target_size_gb * 1024 * 1024 * 1024
-    headers = get_csv_headers()
-
-    # Generate a small sample to estimate row size
-    # Note: generate_event_data returns ALL events (page_view + page_pings)
-    sample_events = generate_event_data(target_date, num_events=100, mobile_percentage=mobile_percentage)
 
-    # Write sample to temp file to measure size
-    temp_file = f"{filename}.tmp"
-    with open(temp_file, 'w', newline='', encoding='utf-8') as csvfile:
-        writer = csv.writer(csvfile)
-        writer.writerow(headers)
-        writer.writerows(sample_events)
+    # Generate a small sample to estimate row size, measuring each line's encoded size
+    # without writing it anywhere
+    # Note: iter_event_data yields ALL events (page_view + page_pings)
+    sample_row_sizes = [
+        len(line.encode('utf-8')) + len(CSV_LINE_END)
+        for line in iter_event_data(target_date, num_events=100, mobile_percentage=mobile_percentage)
+    ]
 
-    sample_size = os.path.getsize(temp_file)
-    header_size = len(','.join(headers)) + 1  # Approximate header size
+    header_size = len(CSV_HEADER_LINE)  # ASCII, so characters == bytes
     # FIXED: Use actual number of rows written, not num_events parameter
-    actual_rows_in_sample = len(sample_events)
-    avg_row_size = (sample_size - header_size) / actual_rows_in_sample
+    actual_rows_in_sample = len(sample_row_sizes)
+    avg_row_size = sum(sample_row_sizes) / actual_rows_in_sample
 
     # Calculate estimated number of PAGE VIEWS needed (not total rows)
     # Each page view generates ~7 events on average (1 page_view + ~6 page_pings)
@@ -487,48 +604,41 @@ def generate_events_by_size(filename, target_date, target_size_gb, mobile_percen
     print(f"Estimated page views needed for {target_size_gb} GB: {estimated_page_views:,}")
     print(f"Estimated total rows: {estimated_total_rows:,}")
 
-    # Remove temp file
-    os.remove(temp_file)
-
     # Generate events in batches
-    batch_size = 1000  # Page views per batch (will generate ~7x this many rows)
-    all_events = []
+    batch_size = PAGE_VIEW_BATCH_SIZE  # Page views per batch (will generate ~7x this many rows)
+    total_events = 0
     page_views_generated = 0
 
-    print(f"Generating page views in batches of {batch_size:,}...")
-
-    with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-        writer = csv.writer(csvfile)
-        writer.writerow(headers)
+    print(f"Generating page views in batches of {batch_size:,} on {os.cpu_count() or 1} CPU(s)...")
 
-        while page_views_generated < estimated_page_views:
-            # Generate batch
-            remaining = estimated_page_views - page_views_generated
-            current_batch_size = min(batch_size, remaining)
+    with BackgroundWriter(filename, compress=compress) as csvfile:
+        csvfile.write(CSV_HEADER_LINE)
 
-            batch_events = generate_event_data(target_date, num_events=current_batch_size, mobile_percentage=mobile_percentage)
-            writer.writerows(batch_events)
-            all_events.extend(batch_events)
+        for batch_text, batch_rows, batch_page_views in iter_event_batches(target_date, estimated_page_views, mobile_percentage):
+            csvfile.write(batch_text)
+            total_events += batch_rows
 
-            page_views_generated += current_batch_size
-            current_size = os.path.getsize(filename) / (1024 * 1024 * 1024)  # Size in GB
+            page_views_generated += batch_page_views
 
             if page_views_generated % 5000 == 0 or page_views_generated == estimated_page_views:
-                print(f"  Progress: {page_views_generated:,} page views ({len(all_events):,} total events), {current_size:.3f} GB")
+                # Tracked by the writer instead of a stat call; uncompressed, like target_size_gb
+                current_size = csvfile.bytes_written / (1024 * 1024 * 1024)  # Size in GB
+                print(f"  Progress: {page_views_generated:,} page views ({total_events:,} total events), {current_size:.3f} GB")
     
     final_size = os.path.getsize(filename) / (1024 * 1024 * 1024)
-    print(f"✓ Generated {len(all_events):,} events in {filename} ({final_size:.3f} GB)")
+    print(f"✓ Generated {total_events:,} events in {filename} ({final_size:.3f} GB)")
     
-    return all_events
+    return total_events
 
 def print_usage():
     """Print usage information."""
     print("Usage:")
-    print("  python gen_events.py [--rows N | --gb SIZE]")
+    print("  python gen_events.py [--rows N | --gb SIZE] [--gzip]")
     print()
     print("Options:")
     print("  --rows N      Generate N rows per file (default: 1000)")
     print("  --gb SIZE     Generate files based on total size SIZE GB")
+    print("  --gzip        Write gzip-compressed .csv.gz files (SIZE is the uncompressed size)")
     print()
     print("Output files:")
     print("  - events_yesterday.csv: Half of total size (SIZE/2 GB)")
@@ -539,6 +649,10 @@ def print_usage():
     print("  python gen_events.py --gb 1")
     print("    → events_yesterday.csv: 0.5 GB")
     print("    → events_today.csv: 0.5 GB")
+    print()
+    print("The generator only uses the standard library, so for large --gb targets it can also be")
+    print("run with PyPy, which speeds up the per-row string building:")
+    print("  pypy3 gen_events.py --gb 10")
 
 def main():
     """Generate events files based on scale factor."""
@@ -547,46 +661,51 @@ def main():
     use_size_mode = False
     scale_factor_gb = None
     num_events = 1000  # default
+    compress = '--gzip' in sys.argv
+    argv = [arg for arg in sys.argv if arg != '--gzip']
     
-    if len(sys.argv) > 1:
-        if sys.argv[1] in ['-h', '--help']:
+    if len(argv) > 1:
+        if argv[1] in ['-h', '--help']:
             print_usage()
             return
-        elif sys.argv[1] in ['--gb', '--scale-factor']:
-            if len(sys.argv) < 3:
+        elif argv[1] in ['--gb', '--scale-factor']:
+            if len(argv) < 3:
                 print("Error: --gb requires a size argument")
                 print_usage()
                 sys.exit(1)
             try:
-                scale_factor_gb = float(sys.argv[2])
+                scale_factor_gb = float(argv[2])
                 use_size_mode = True
             except ValueError:
-                print(f"Error: '{sys.argv[2]}' is not a valid number")
+                print(f"Error: '{argv[2]}' is not a valid number")
                 print_usage()
                 sys.exit(1)
-        elif sys.argv[1] == '--rows':
-            if len(sys.argv) < 3:
+        elif argv[1] == '--rows':
+            if len(argv) < 3:
                 print("Error: --rows requires a number argument")
                 print_usage()
                 sys.exit(1)
             try:
-                num_events = int(sys.argv[2])
+                num_events = int(argv[2])
             except ValueError:
-                print(f"Error: '{sys.argv[2]}' is not a valid number")
+                print(f"Error: '{argv[2]}' is not a valid number")
                 print_usage()
                 sys.exit(1)
         else:
             # Backward compatibility: assume it's a row count
             try:
-                num_events = int(sys.argv[1])
+                num_events = int(argv[1])
             except ValueError:
-                print(f"Error: '{sys.argv[1]}' is not a valid number")
+                print(f"Error: '{argv[1]}' is not a valid number")
                 print_usage()
                 sys.exit(1)
     
     # Set specific dates: November 1st (yesterday) and November 2nd (today)
     yesterday = datetime(2025, 11, 1).date()  # November 1st
     today = datetime(2025, 11, 2).date()  # November 2nd
+    suffix = '.csv.gz' if compress else '.csv'
+    yesterday_file = f'events_yesterday{suffix}'
+    today_file = f'events_today{suffix}'
     
     print("="*60)
     print("Snowplow Event Data Generator")
@@ -596,18 +715,18 @@ def main():
         print(f"Mode: Size-based generation")
         print(f"Total size: {scale_factor_gb} GB")
         print(f"Generating files:")
-        print(f"  - events_yesterday.csv: {scale_factor_gb/2} GB (66% mobile)")
-        print(f"  - events_today.csv: {scale_factor_gb/2} GB (50% mobile)")
+        print(f"  - {yesterday_file}: {scale_factor_gb/2} GB (66% mobile)")
+        print(f"  - {today_file}: {scale_factor_gb/2} GB (50% mobile)")
         print()
 
         # Generate events_yesterday.csv (half of total size, 66% mobile)
-        print(f"Generating events_yesterday.csv ({scale_factor_gb/2} GB, 66% mobile)...")
-        yesterday_events = generate_events_by_size('events_yesterday.csv', yesterday, scale_factor_gb/2, mobile_percentage=66)
+        print(f"Generating {yesterday_file} ({scale_factor_gb/2} GB, 66% mobile)...")
+        generate_events_by_size(yesterday_file, yesterday, scale_factor_gb/2, mobile_percentage=66, compress=compress)
 
         print()
         # Generate events_today.csv (half of total size, 50% mobile)
-        print(f"Generating events_today.csv ({scale_factor_gb/2} GB, 50% mobile)...")
-        today_events = generate_events_by_size('events_today.csv', today, scale_factor_gb/2, mobile_percentage=50)
+        print(f"Generating {today_file} ({scale_factor_gb/2} GB, 50% mobile)...")
+        generate_events_by_size(today_file, today, scale_factor_gb/2, mobile_percentage=50, compress=compress)
         
     else:
         print(f"Mode: Row-based generation")
@@ -617,20 +736,13 @@ def main():
         print(f"  Today: {today} (50% mobile)")
         print()
 
-        # Generate events for yesterday (66% mobile)
-        print(f"Generating yesterday's events ({num_events:,} page views, 66% mobile)...")
-        yesterday_events = generate_event_data(yesterday, num_events=num_events, mobile_percentage=66)
+        # Generate events for yesterday (66% mobile) straight into the first file
+        print(f"Creating {yesterday_file} ({num_events:,} page views, 66% mobile)...")
+        write_events_csv(yesterday_file, yesterday, num_events, mobile_percentage=66, compress=compress)
 
         # Generate events for today (50% mobile)
-        print(f"Generating today's events ({num_events:,} page views, 50% mobile)...")
-        today_events = generate_event_data(today, num_events=num_events, mobile_percentage=50)
-
-        # Create the two required files
-        print(f"Creating events_yesterday.csv ({len(yesterday_events):,} total events)...")
-        write_events_csv('events_yesterday.csv', yesterday_events)
-
-        print(f"Creating events_today.csv ({len(today_events):,} total events)...")
-        write_events_csv('events_today.csv', today_events)
+        print(f"Creating {today_file} ({num_events:,} page views, 50% mobile)...")
+        write_events_csv(today_file, today, num_events, mobile_percentage=50, compress=compress)
     
     print()
     print("="*60)
@@ -638,12 +750,12 @@ def main():
     print("="*60)
     print("Files generated:")
     if use_size_mode:
-        print(f"  - events_yesterday.csv ({scale_factor_gb/2} GB)")
-        print(f"  - events_today.csv ({scale_factor_gb/2} GB)")
+        print(f"  - {yesterday_file} ({scale_factor_gb/2} GB)")
+        print(f"  - {today_file} ({scale_factor_gb/2} GB)")
         print(f"  Total: {scale_factor_gb} GB")
     else:
-        print(f"  - events_yesterday.csv ({num_events:,} rows)")
-        print(f"  - events_today.csv ({num_events:,} rows)")
+        print(f"  - {yesterday_file} ({num_events:,} rows)")
+        print(f"  - {today_file} ({num_events:,} rows)")
         print(f"  Total: {num_events * 2:,} rows")
     print("="*60)
 
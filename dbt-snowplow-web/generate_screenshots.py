@@ -8,11 +8,19 @@ import argparse
 import asyncio
 import sys
 from pathlib import Path
-from playwright.async_api import async_playwright
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError, async_playwright
 
 
-async def capture_screenshot(html_path: str, output_path: str, width: int = 1400, height: int = 2000):
-    """Capture a screenshot of an HTML file."""
+# Mermaid marks each diagram container with data-processed="true" once its SVG is in the page
+MERMAID_RENDERED = (
+    "document.querySelector('.mermaid svg') !== null"
+    " && document.querySelector('.mermaid:not([data-processed=\"true\"])') === null"
+)
+RENDER_TIMEOUT_MS = 10000
+
+
+async def capture_screenshot(browser, html_path: str, output_path: str, width: int = 1400, height: int = 2000):
+    """Capture a screenshot of an HTML file in a new page of an already launched browser."""
     html_file = Path(html_path)
     if not html_file.exists():
         print(f"Error: HTML file not found: {html_path}")
@@ -23,20 +31,21 @@ async def capture_screenshot(html_path: str, output_path: str, width: int = 1400
     
     print(f"Capturing screenshot: {html_path} -> {output_path}")
     
-    async with async_playwright() as p:
-        browser = await p.chromium.launch()
-        page = await browser.new_page(viewport={'width': width, 'height': height})
-        
+    page = await browser.new_page(viewport={'width': width, 'height': height})
+    try:
         # Load the HTML file
         await page.goto(f'file://{html_file.absolute()}')
         
-        # Wait for Mermaid diagram to render
-        await page.wait_for_timeout(3000)  # Wait 3 seconds for rendering
+        # Wait for Mermaid diagram to render; capture whatever is there if it takes too long
+        try:
+            await page.wait_for_function(MERMAID_RENDERED, timeout=RENDER_TIMEOUT_MS)
+        except PlaywrightTimeoutError:
+            print(f"Warning: Mermaid diagram did not finish rendering within {RENDER_TIMEOUT_MS} ms: {html_path}")
         
         # Take screenshot
         await page.screenshot(path=str(output_file), full_page=True)
-        
-        await browser.close()
+    finally:
+        await page.close()
     
     print(f"✓ Screenshot saved: {output_path}")
     return True
@@ -84,11 +93,24 @@ async def main():
     print(f"Output directory: {visualizations_dir}")
     print("")
     
+    # Launch Chromium once and capture all screenshots concurrently in separate pages;
+    # most of each capture is spent waiting on the browser
+    async with async_playwright() as p:
+        browser = await p.chromium.launch()
+        try:
+            results = await asyncio.gather(
+                *(capture_screenshot(browser, str(item['html']), str(item['png'])) for item in screenshots),
+                return_exceptions=True
+            )
+        finally:
+            await browser.close()
     success_count = 0
-    for item in screenshots:
-        if await capture_screenshot(str(item['html']), str(item['png'])):
+    for item, result in zip(screenshots, results):
+        if isinstance(result, Exception):
+            print(f"Error capturing {item['name']}: {result}")
+        elif result:
             success_count += 1
-        print("")
+    print("")
     
     print(f"✓ Generated {success_count}/{len(screenshots)} screenshots")
     
@@ -7,7 +7,7 @@ Generates an interactive HTML report with Mermaid diagram.
 import json
 import argparse
 from pathlib import Path
-from typing import Dict, List, Set, Tuple
+from typing import Dict, List, Optional, Set, Tuple
 from datetime import datetime
 
 
@@ -49,11 +49,17 @@ def parse_manifest(manifest_path: str) -> Tuple[Dict, Dict]:
     return models, sources
 
 
-def parse_run_results(run_results_path: str) -> Dict:
-    """Parse run_results.json to extract execution metrics."""
+def parse_run_results(run_results_path: str, row_counts_path: Optional[str] = None) -> Dict:
+    """Parse run_results.json to extract execution metrics, merging in row counts if given."""
     with open(run_results_path, 'r') as f:
         run_results = json.load(f)
     
+    # Sidecar written by enrich_run_results.py --sidecar: {unique_id: actual_row_count}
+    row_counts = {}
+    if row_counts_path:
+        with open(row_counts_path, 'r') as f:
+            row_counts = json.load(f)
+    
     metrics = {}
     for result in run_results['results']:
         unique_id = result['unique_id']
@@ -64,7 +70,11 @@ def parse_run_results(run_results_path: str) -> Dict:
         
         execution_time = result.get('execution_time', 0)
         # Use actual_row_count if available (from enrich_run_results.py), otherwise use rows_affected
-        rows_affected = result.get('actual_row_count') or result.get('adapter_response', {}).get('rows_affected', 0)
+        rows_affected = (
+            row_counts.get(unique_id)
+            or result.get('actual_row_count')
+            or result.get('adapter_response', {}).get('rows_affected', 0)
+        )
 
         metrics[unique_id] = {
             'execution_time': execution_time,
@@ -472,6 +482,7 @@ def main():
     parser = argparse.ArgumentParser(description='Visualize dbt-snowplow-web model lineage')
     parser.add_argument('--manifest', required=True, help='Path to manifest.json')
     parser.add_argument('--run-results', required=True, help='Path to run_results.json')
+    parser.add_argument('--row-counts', help='Row count sidecar from enrich_run_results.py --sidecar')
     parser.add_argument('--output', required=True, help='Output HTML file path')
     parser.add_argument('--title', default='dbt-snowplow-web Lineage', help='Diagram title')
     parser.add_argument('--row-label', default='Rows Affected', help='Label for row count column (e.g., "Rows Created" or "Rows Affected")')
@@ -483,7 +494,7 @@ def main():
     print(f"Found {len(models)} models and {len(sources)} sources")
 
     print(f"Parsing run results: {args.run_results}")
-    metrics = parse_run_results(args.run_results)
+    metrics = parse_run_results(args.run_results, args.row_counts)
     print(f"Found metrics for {len(metrics)} models")
 
     print("Building dependency graph...")